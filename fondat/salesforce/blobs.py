@@ -0,0 +1,112 @@
+"""Fondat Salesforce binary field content module."""
+
+import aiohttp
+import asyncio
+import json
+
+from collections.abc import AsyncIterable, Awaitable, Callable, Mapping
+from fondat.salesforce.client import Client
+from fondat.salesforce.sobjects import SObject
+from typing import Any
+
+
+_entity_parts = {"ContentVersion": "entity_content"}  # exceptions to entity_{name} naming
+
+
+class Blobs:
+    """
+    Streams the content of binary (base64) fields of Salesforce object records.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • sobject: Salesforce object metadata
+    • concurrency: maximum number of transfers to perform concurrently
+    • chunk_size: maximum size of chunks of downloaded content, in bytes
+
+    Content is transferred in chunks, without being held in memory in its entirety, allowing
+    files of any size to be migrated with constant memory. Transfers beyond the concurrency
+    limit wait for preceding transfers to complete. Because streamed uploads cannot be
+    resent, they are not retried on server or authentication errors.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: SObject,
+        *,
+        concurrency: int = 4,
+        chunk_size: int = 65536,
+    ):
+        self.client = client
+        self.sobject = sobject
+        self.blob_fields = {f.name for f in sobject.fields if f.type == "base64"}
+        self.path = f"{client.resources['sobjects']}/{sobject.name}"
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.chunk_size = chunk_size
+
+    def _check(self, field: str):
+        if field not in self.blob_fields:
+            raise ValueError(f"not a binary field: {field}")
+
+    async def download(
+        self, id: str, field: str, sink: Callable[[bytes], Awaitable[Any]]
+    ) -> int:
+        """
+        Download the content of a binary field of a record, passing each chunk of content to
+        an asynchronous sink (e.g. a file write method). Returns the number of bytes
+        downloaded.
+        """
+        self._check(field)
+        size = 0
+        async with self.semaphore:
+            async with self.client.request(
+                "GET", f"{self.path}/{id}/{field}", headers={"Accept": "*/*"}
+            ) as response:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    await sink(chunk)
+                    size += len(chunk)
+        return size
+
+    async def upload(
+        self,
+        field: str,
+        content: AsyncIterable[bytes],
+        *,
+        filename: str,
+        values: Mapping[str, Any] | None = None,
+        id: str | None = None,
+        content_type: str = "application/octet-stream",
+    ) -> str:
+        """
+        Upload content to a binary field of a record, as a streamed multipart request. If an
+        id is supplied, the existing record is updated; otherwise, a new record is created.
+        Returns the id of the record.
+
+        Parameters:
+        • field: name of binary field to upload content to
+        • content: asynchronous iterable of content chunks
+        • filename: name of the file being uploaded
+        • values: values of other fields of the record, as JSON-compatible values
+        • id: id of the record to update  [create new record]
+        • content_type: media type of the content
+        """
+        self._check(field)
+        with aiohttp.MultipartWriter("form-data") as body:
+            entity = body.append(
+                json.dumps(dict(values or {})), {"Content-Type": "application/json"}
+            )
+            entity.set_content_disposition(
+                "form-data",
+                name=_entity_parts.get(
+                    self.sobject.name, f"entity_{self.sobject.name.lower()}"
+                ),
+            )
+            blob = body.append(content, {"Content-Type": content_type})
+            blob.set_content_disposition("form-data", name=field, filename=filename)
+        async with self.semaphore:
+            async with self.client.request(
+                "PATCH" if id else "POST", f"{self.path}/{id}" if id else self.path, data=body
+            ) as response:
+                if id:
+                    return id
+                return (await response.json())["id"]
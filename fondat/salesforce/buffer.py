@@ -0,0 +1,178 @@
+"""Fondat Salesforce write-behind buffer module."""
+
+import asyncio
+import logging
+
+from collections.abc import Mapping
+from fondat.salesforce.client import Client
+from fondat.salesforce.composite import COLLECTION_LIMIT, composite_resource
+from typing import Any
+
+
+_logger = logging.getLogger(__name__)
+
+
+class _Write:
+    """A pending record write, and the futures of the callers awaiting its result."""
+
+    __slots__ = ("values", "futures")
+
+    def __init__(self, values: dict[str, Any]):
+        self.values = values
+        self.futures = []
+
+
+class WriteBuffer:
+    """
+    Buffers individual record writes of a Salesforce object, performing them in batches
+    through sObject collection requests.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • sobject: name of Salesforce object
+    • batch_size: number of buffered writes that triggers a flush
+    • max_age: maximum seconds a write is buffered before it is flushed
+    • all_or_none: roll back each batch request if any record fails
+
+    Each write method returns a future, which resolves to the save result of the record once
+    its batch is performed. If a batch request fails, its futures are resolved with the
+    exception. Record values must be JSON-compatible.
+
+    Updates to the same record Id, and upserts of the same external ID value, are merged
+    into a single write while buffered; later values take precedence. Merged writes share
+    the same save result.
+
+    The buffer is flushed when the number of buffered writes reaches the batch size, when
+    the oldest buffered write reaches the maximum age, on explicit flush, and on exiting the
+    async context.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: str,
+        *,
+        batch_size: int = COLLECTION_LIMIT,
+        max_age: float = 1.0,
+        all_or_none: bool = False,
+    ):
+        self.client = client
+        self.sobject = sobject
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.all_or_none = all_or_none
+        self.composite = composite_resource(client)
+        self._creates = []
+        self._updates = {}  # keyed by record Id
+        self._upserts = {}  # keyed by (external ID field, value)
+        self._timer = None
+        self._scheduled = False
+        self._flushes = set()
+
+    def __len__(self) -> int:
+        """Return the number of buffered writes."""
+        return len(self._creates) + len(self._updates) + len(self._upserts)
+
+    def _buffer(self, writes: dict[Any, _Write], key: Any, values: Mapping[str, Any]):
+        write = writes.get(key)
+        if write is None:
+            write = writes[key] = _Write(dict(values))
+        else:
+            write.values.update(values)
+        return self._pending(write)
+
+    def _pending(self, write: _Write) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        write.futures.append(future)
+        if len(self) >= self.batch_size and not self._scheduled:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_age, self._schedule_flush
+            )
+        return future
+
+    def create(self, values: Mapping[str, Any]) -> asyncio.Future:
+        """Buffer the creation of a record."""
+        write = _Write(dict(values))
+        self._creates.append(write)
+        return self._pending(write)
+
+    def update(self, id: str, values: Mapping[str, Any]) -> asyncio.Future:
+        """Buffer the update of a record, merging with any buffered update of the record."""
+        return self._buffer(self._updates, id, {**values, "Id": id})
+
+    def upsert(self, external_id: str, values: Mapping[str, Any]) -> asyncio.Future:
+        """
+        Buffer the creation or update of a record, matched by the value of an external ID
+        field, which must be included in values. Merges with any buffered upsert of the
+        same value.
+        """
+        if external_id not in values:
+            raise ValueError(f"values must include external ID field: {external_id}")
+        return self._buffer(self._upserts, (external_id, values[external_id]), values)
+
+    def _schedule_flush(self):
+        self._scheduled = True
+        task = asyncio.create_task(self._flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _send(self, writes: list[_Write], send) -> None:
+        records = [{"attributes": {"type": self.sobject}, **w.values} for w in writes]
+        try:
+            results = await send(records=records, all_or_none=self.all_or_none)
+        except Exception as e:
+            _logger.debug("batch of %d %s writes failed", len(writes), self.sobject)
+            for write in writes:
+                for future in write.futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for write, result in zip(writes, results):
+            for future in write.futures:
+                if not future.done():
+                    future.set_result(result)
+
+    async def flush(self) -> None:
+        """Perform all buffered writes, and wait for them and any flushes in progress."""
+        await self._flush()
+        await asyncio.gather(*self._flushes)
+
+    async def _flush(self) -> None:
+        self._scheduled = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        creates, self._creates = self._creates, []
+        updates, self._updates = self._updates, {}
+        upserts, self._upserts = self._upserts, {}
+        sends = []
+
+        def batches(writes: list[_Write], send):
+            for n in range(0, len(writes), COLLECTION_LIMIT):
+                sends.append(self._send(writes[n : n + COLLECTION_LIMIT], send))
+
+        batches(creates, self.composite.create)
+        batches(list(updates.values()), self.composite.update)
+        fields = {}
+        for (field, _), write in upserts.items():
+            fields.setdefault(field, []).append(write)
+        for field, writes in fields.items():
+
+            async def upsert(*, records, all_or_none, field=field):
+                return await self.composite.upsert(
+                    sobject=self.sobject,
+                    external_id=field,
+                    records=records,
+                    all_or_none=all_or_none,
+                )
+
+            batches(writes, upsert)
+        await asyncio.gather(*sends)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.flush()
@@ -1,19 +1,213 @@
 """Fondat Salesforce bulk module."""
 
 import asyncio
+import uuid
 
 from collections import deque, namedtuple
-from collections.abc import Iterable
+from collections.abc import AsyncIterator, Iterable, Mapping
+from concurrent.futures import Executor
 from contextlib import suppress
+from fondat.codec import StringCodec
 from fondat.csv import TypedDictCodec
 from fondat.salesforce.client import Client
-from fondat.salesforce.jobs import queries_resource
-from fondat.salesforce.sobjects import SObject, sobject_field_type
+from fondat.salesforce.jobs import JobReaper, Operation, parse_csv, queries_resource
+from fondat.salesforce.metadata import MetadataStore, describe_sobjects
+from fondat.salesforce.sobjects import Field, SObject, sobject_field_type
+from functools import lru_cache
+from sys import intern
 from time import time
 from typing import Any, TypedDict
+from urllib.parse import parse_qs, urlsplit
 
 
-_exclude_types = {"address", "location"}
+EXCLUDED_TYPES = frozenset({"address", "location"})  # field types not supported by queries
+
+
+_memo_types = {"boolean", "date", "datetime", "picklist", "reference"}
+
+_memo_size = 4096  # maximum number of decoded values memoized per column
+
+
+class _MemoCodec:
+    """
+    Decodes repeated column values once, sharing decoded values between rows. Known values
+    (e.g. active picklist values) are dictionary-encoded; other values are memoized in a
+    bounded least-recently-used cache.
+    """
+
+    def __init__(self, python_type: Any, values: Iterable[str] = ()):
+        self.codec = StringCodec.get(python_type)
+        self.values = {value: self.codec.decode(intern(value)) for value in values}
+        self._decode = lru_cache(_memo_size)(self.codec.decode)
+
+    def encode(self, value: Any) -> str:
+        return self.codec.encode(value)
+
+    def decode(self, value: str) -> Any:
+        result = self.values.get(value)
+        return result if result is not None else self._decode(value)
+
+
+def _memo_codecs(
+    columns: tuple[tuple[str, Any], ...], memo: tuple[tuple[str, tuple[str, ...]], ...]
+) -> dict[str, _MemoCodec]:
+    """Return memoizing codecs for columns, from their names and known values."""
+    types = dict(columns)
+    return {name: _MemoCodec(types[name], values) for name, values in memo}
+
+
+_codecs = {}  # cache of codecs used to decode pages in executor
+
+
+def _decode_page(
+    key: str,
+    columns: tuple[tuple[str, Any], ...],
+    memo: tuple[tuple[str, tuple[str, ...]], ...],
+    data: bytes,
+) -> list[dict]:
+    """Parse and decode a page of CSV results; performed in an executor."""
+    rows = parse_csv(data)
+    codec_key = (key, tuple(rows[0]))
+    codec = _codecs.get(codec_key)
+    if codec is None:
+        codec = TypedDictCodec(
+            TypedDict("QueryDict", dict(columns)), rows[0], codecs=_memo_codecs(columns, memo)
+        )
+        while len(_codecs) >= 64:
+            _codecs.pop(next(iter(_codecs)), None)
+        _codecs[codec_key] = codec
+    return [codec.decode(row) for row in rows[1:]]
+
+
+def _relationship(sobject: SObject, name: str) -> Field | None:
+    """Return the reference field of an object with the specified relationship name."""
+    for field in sobject.fields:
+        if field.type == "reference" and field.relationshipName == name:
+            return field
+
+
+def _parents(sobjects: Iterable[SObject], related: Mapping[str, SObject], name: str):
+    """Return the metadata of parent objects of a relationship, where available."""
+    for sobject in sobjects:
+        if field := _relationship(sobject, name):
+            yield from (related[t] for t in field.referenceTo or () if t in related)
+
+
+def resolve_path(
+    sobject: SObject, related: Mapping[str, SObject], path: list[str]
+) -> Field | None:
+    """Return the parent object field of a relationship path, or None if not resolved."""
+    sobjects = [sobject]
+    for name in path[:-1]:
+        sobjects = list(_parents(sobjects, related, name))
+    for sobject in sobjects:  # first match, for polymorphic relationships
+        for field in sobject.fields:
+            if field.name == path[-1]:
+                return field
+
+
+async def describe_related(
+    client: Client, sobject: SObject, columns: Iterable[str]
+) -> MetadataStore:
+    """
+    Describe the parent objects referenced by relationship path columns.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • sobject: metadata of the object to be queried
+    • columns: columns to be selected, including relationship paths
+
+    Returns a metadata store suitable for the related parameter of SObjectQuery. For a
+    polymorphic relationship, all referenced objects are described.
+    """
+    store = MetadataStore()
+    paths = [c.split(".") for c in columns if isinstance(c, str) and "." in c]
+    for depth in range(max((len(path) - 1 for path in paths), default=0)):
+        names = set()
+        for path in (p for p in paths if len(p) - 1 > depth):
+            sobjects = [sobject]
+            for name in path[:depth]:
+                sobjects = list(_parents(sobjects, store, name))
+            for parent in sobjects:
+                if field := _relationship(parent, path[depth]):
+                    names.update(t for t in field.referenceTo or () if t not in store)
+        if names:
+            await describe_sobjects(client, names, store=store)
+    return store
+
+
+def _count_rows(data: bytes) -> int:
+    """
+    Return the number of rows in a page of CSV results, excluding the header row. Line
+    endings within quoted values are not counted.
+    """
+    lines = data.split(b"\n")
+    rows = 0
+    quotes = 0
+    for line in lines[:-1]:
+        quotes += line.count(b'"')
+        if not quotes % 2:  # line ending is not within a quoted value
+            rows += 1
+    if lines[-1]:  # final row without line ending
+        rows += 1
+    return max(rows - 1, 0)
+
+
+class AdaptivePageSize:
+    """
+    Adjusts the number of rows to retrieve per result page, based on the measured size and
+    latency of previously retrieved pages.
+
+    Parameters:
+    • initial: number of rows to retrieve in the first page
+    • minimum: minimum number of rows to retrieve per page
+    • maximum: maximum number of rows to retrieve per page
+    • target_bytes: target size of each result page, in bytes
+    • target_latency: target time to retrieve each result page, in seconds
+    • growth: maximum factor by which page size can change between pages
+
+    Bytes and seconds per row are tracked as exponentially weighted moving averages. The page
+    size is the largest number of rows expected to meet both targets, within bounds. An object
+    can be shared by successive queries of the same object, to carry forward measurements.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int = 1000,
+        minimum: int = 100,
+        maximum: int = 250000,
+        target_bytes: int = 16 * 1024 * 1024,
+        target_latency: float = 10.0,
+        growth: float = 4.0,
+    ):
+        if not 0 < minimum <= initial <= maximum:
+            raise ValueError("page sizes must satisfy: 0 < minimum <= initial <= maximum")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_bytes = target_bytes
+        self.target_latency = target_latency
+        self.growth = growth
+        self.size = initial
+        self.bytes_per_row = None
+        self.seconds_per_row = None
+
+    @staticmethod
+    def _average(average: float | None, value: float) -> float:
+        return value if average is None else (average + value) / 2
+
+    def update(self, rows: int, nbytes: int, seconds: float) -> int:
+        """Record the measurements of a retrieved page, and return the adjusted page size."""
+        if rows <= 0:
+            return self.size
+        self.bytes_per_row = self._average(self.bytes_per_row, nbytes / rows)
+        self.seconds_per_row = self._average(self.seconds_per_row, seconds / rows)
+        size = self.target_bytes / max(self.bytes_per_row, 1)
+        if self.seconds_per_row > 0:
+            size = min(size, self.target_latency / self.seconds_per_row)
+        size = min(max(size, self.size / self.growth), self.size * self.growth)
+        self.size = int(min(max(size, self.minimum), self.maximum))
+        return self.size
 
 
 class SObjectQuery:
@@ -27,8 +221,38 @@ class SObjectQuery:
     • where: query conditon expression
     • order_by: order of query results
     • limit: maximum number of rows in query results
-    • page_size: number of rows to retrieve per page
+    • page_size: number of rows to retrieve per page, or adaptive page size  [1000]
     • timeout: seconds to wait for query job to complete
+    • executor: executor in which to parse and decode result pages  [event loop]
+    • prefetch: number of result pages to retrieve ahead of decoding in executor
+    • related: metadata of related objects, keyed by object name
+    • reaper: reaper to delete the query job in the background  [new reaper]
+    • operation: "query", or "queryAll" to include deleted and archived records
+    • parallel: number of result pages to retrieve concurrently  [serial retrieval]
+    • ordered: return rows in result order when retrieving pages concurrently
+
+    A column can be a relationship path to a parent object field (e.g. "Account.Owner.Name"),
+    resolved through reference fields and the metadata of related objects. Its value is typed
+    by the parent field and returned in the row under the path name. The describe_related
+    function can provide the metadata of related objects. Child relationship subqueries are
+    not supported by bulk queries.
+
+    If an executor is provided, the event loop only retrieves raw result pages; parsing and
+    decoding are performed in the executor, allowing multiple queries to make use of multiple
+    processor cores. Decoded rows are still returned in result order. A process pool executor
+    requires column types to be picklable.
+
+    Values of picklist, reference, boolean, date and datetime fields are typically repeated
+    across many rows. Each distinct value of these columns is decoded once, and the decoded
+    value is shared by all rows containing it.
+
+    If parallel retrieval is requested, the links to all result pages of the completed job
+    are listed up front (requires API version 62.0 or later), and up to the specified number
+    of pages are retrieved and held at once. Rows are returned either in result order, or in
+    the order that pages are retrieved. Page size is determined by the server.
+
+    On exiting the context, a query job that is not known to be complete is aborted; the job
+    is then deleted in the background by the reaper.
     """
 
     Column = namedtuple("Column", "name, expression, type")
@@ -42,29 +266,52 @@ class SObjectQuery:
         where: str | None = None,
         order_by: str | None = None,
         limit: int | None = None,
-        page_size: int | None = None,
+        page_size: int | AdaptivePageSize | None = None,
         timeout: int | None = None,
+        executor: Executor | None = None,
+        prefetch: int = 2,
+        related: Mapping[str, SObject] | None = None,
+        reaper: JobReaper | None = None,
+        operation: Operation = "query",
+        parallel: int | None = None,
+        ordered: bool = True,
     ):
+        if parallel and float(client.version) < 62.0:
+            raise ValueError("parallel retrieval requires API version 62.0 or later")
         self.client = client
+        self.reaper = reaper
         self.page_size = page_size
+        self.executor = executor
+        self.prefetch = prefetch
         columns = (
-            [f.name for f in sobject.fields if f.type not in _exclude_types]
+            [f.name for f in sobject.fields if f.type not in EXCLUDED_TYPES]
             if columns is None
             else list(columns)
         )
         if len(columns) == 0:
             raise ValueError("must select at least one column")
         fields = {field.name: field for field in sobject.fields}
+        memo = []
         for n, column in enumerate(columns):
             if isinstance(column, SObjectQuery.Column):
                 continue
-            field = fields.get(column)
+            if "." in column:
+                field = resolve_path(sobject, related or {}, column.split("."))
+            else:
+                field = fields.get(column)
             if not field:
                 raise ValueError(f"unknown field: {column}")
-            if field.type in _exclude_types:
+            if field.type in EXCLUDED_TYPES:
                 raise ValueError(f"cannot query {field.type} type field: {column}")
             columns[n] = SObjectQuery.Column(column, None, sobject_field_type(field))
-        self.td = TypedDict("QueryDict", {column.name: column.type for column in columns})
+            if field.type in _memo_types:
+                values = (getattr(e, "value", e) for e in field.picklistValues or ())
+                memo.append((column, tuple(values)))
+        self.columns = tuple((column.name, column.type) for column in columns)
+        self.memo = tuple(memo)
+        self.codecs = _memo_codecs(self.columns, self.memo)
+        self.td = TypedDict("QueryDict", dict(self.columns))
+        self.key = uuid.uuid4().hex
         self.stmt = "SELECT "
         self.stmt += ", ".join(
             ((c.expression or c.name) + (f" {c.name}" if c.expression else "")) for c in columns
@@ -77,16 +324,20 @@ class SObjectQuery:
         if limit:
             self.stmt += f" LIMIT {limit}"
         self.timeout = timeout
+        self.operation = operation
+        self.parallel = parallel
+        self.ordered = ordered
         self.query = None
-        self.results = None
-        self.header = None
-        self.cursor = None
+        self.complete = False
+        self.rows = None
 
     async def info(self):
         return await self.query.get()
 
     async def _await_complete(self):
         """Wait for job to be complete."""
+        if self.complete:
+            return
         start = time()
         sleep = 1
         while (state := (await self.info()).state) in {"UploadComplete", "InProgress"}:
@@ -96,38 +347,278 @@ class SObjectQuery:
             sleep = min(sleep * 2, 60)
         if state != "JobComplete":
             raise RuntimeError(f"unexpected job state: {state}")
+        self.complete = True
 
     async def __aenter__(self):
         if self.query is not None:
             raise RuntimeError("context is not reentrant")
         queries = queries_resource(self.client)
-        info = await queries.post(operation="query", query=self.stmt)
+        info = await queries.post(operation=self.operation, query=self.stmt)
         self.query = queries[info.id]
         return self
 
     async def __aexit__(self, *args):
-        if self.results is None:
-            with suppress(asyncio.exceptions.TimeoutError):
-                await self._await_complete()
-        with suppress(Exception):
-            await self.query.delete()
+        if self.rows is not None:
+            await self.rows.aclose()
+        if not self.complete:
+            with suppress(Exception):  # job may have already completed
+                await self.query.abort()
+        (self.reaper or JobReaper(self.client)).reap(self.query.id)
+
+    async def pages(self) -> AsyncIterator[bytes]:
+        """
+        Asynchronously iterate over raw CSV result pages, waiting for the query job to
+        complete. Each page includes a CSV header row.
+        """
+        if self.query is None:
+            raise RuntimeError("must iterate within async context")
+        await self._await_complete()
+        if self.parallel:
+            async for data in self._parallel_pages():
+                yield data
+            return
+        adaptive = isinstance(self.page_size, AdaptivePageSize)
+        cursor = None
+        while True:
+            limit = self.page_size.size if adaptive else self.page_size or 1000
+            start = time()
+            page = await self.query.data(limit=limit, cursor=cursor)
+            cursor = page.cursor
+            data = page.items[0]
+            if adaptive:
+                self.page_size.update(_count_rows(data), len(data), time() - start)
+            yield data
+            if not cursor:
+                break
+
+    async def _retrieve(self, link: str) -> bytes:
+        """Retrieve the result page at the specified link."""
+        params = parse_qs(urlsplit(link).query)
+        locator = params.get("locator", [None])[0]
+        page = await self.query.data(
+            limit=int(params.get("maxRecords", ["1000"])[0]),
+            cursor=locator.encode() if locator else None,
+        )
+        return page.items[0]
+
+    async def _parallel_pages(self) -> AsyncIterator[bytes]:
+        """Retrieve result pages concurrently, holding up to the parallel number of pages."""
+        tasks = deque()
+
+        async def next_page() -> bytes:
+            if self.ordered:
+                return await tasks.popleft()
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            task = next(task for task in tasks if task in done)
+            tasks.remove(task)
+            return task.result()
+
+        try:
+            cursor = None
+            while True:
+                page = await self.query.result_pages(cursor=cursor)
+                for link in page.items:
+                    tasks.append(asyncio.create_task(self._retrieve(link)))
+                    while len(tasks) >= self.parallel:
+                        yield await next_page()
+                if not (cursor := page.cursor):
+                    break
+            while tasks:
+                yield await next_page()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _decode(self) -> AsyncIterator[dict[str, Any]]:
+        """Parse and decode result pages in the event loop."""
+        async for data in self.pages():
+            rows = parse_csv(data)
+            codec = TypedDictCodec(self.td, rows[0], codecs=self.codecs)
+            for row in rows[1:]:
+                yield codec.decode(row)
+
+    async def _decode_in_executor(self) -> AsyncIterator[dict[str, Any]]:
+        """Parse and decode result pages in the executor, while retrieving subsequent pages."""
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue()
+        slots = asyncio.Semaphore(max(self.prefetch, 1))
+
+        async def retrieve():
+            try:
+                async for data in self.pages():
+                    await slots.acquire()
+                    batches.put_nowait(
+                        loop.run_in_executor(
+                            self.executor,
+                            _decode_page,
+                            self.key,
+                            self.columns,
+                            self.memo,
+                            data,
+                        )
+                    )
+            finally:
+                batches.put_nowait(None)
+
+        task = asyncio.create_task(retrieve())
+        try:
+            while (batch := await batches.get()) is not None:
+                rows = await batch
+                slots.release()
+                for row in rows:
+                    yield row
+            await task  # raise any exception from retrieval
+        finally:
+            task.cancel()
 
     def __aiter__(self):
         if self.query is None:
             raise RuntimeError("must iterate within async context")
         return self
 
-    async def _next_page(self):
-        page = await self.query.results(limit=self.page_size or 1000, cursor=self.cursor)
-        self.results = deque(page.items)
-        self.cursor = page.cursor
-        self.codec = TypedDictCodec(self.td, self.results.popleft())
+    async def __anext__(self) -> dict[str, Any]:
+        if self.rows is None:
+            self.rows = self._decode_in_executor() if self.executor else self._decode()
+        return await anext(self.rows)
+
+
+class PartitionedQuery:
+    """
+    Performs a bulk data query of a wide object as multiple concurrent query jobs, each
+    selecting a group of columns, joining their results by Id.
+
+    Parameters:
+    • client: client object through which to perform queries
+    • sobject: Salesforce object metadata
+    • columns: columns to select  [all fields]
+    • group_size: maximum number of columns selected by each query job, excluding Id
+    • where: query conditon expression
+    • limit: maximum number of rows in query results
+    • page_size: number of rows to retrieve per page, or adaptive page size  [1000]
+    • timeout: seconds to wait for query jobs to complete
+    • buffer: number of rows of each query job to retrieve ahead of joining
+    • related: metadata of related objects, keyed by object name
+    • reaper: reaper to delete the query jobs in the background  [new reaper]
+    • operation: "query", or "queryAll" to include deleted and archived records
+
+    Each query job selects Id and a group of columns, ordered by Id. Rows of each job are
+    retrieved concurrently, and joined by Id in a streaming merge, yielding rows in Id order
+    that contain all selected columns. If a record is absent from the results of a job (e.g.
+    if it was created or deleted while jobs were running), its columns from that job are
+    None.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: SObject,
+        *,
+        columns: Iterable[SObjectQuery.Column | str] | None = None,
+        group_size: int = 100,
+        where: str | None = None,
+        limit: int | None = None,
+        page_size: int | AdaptivePageSize | None = None,
+        timeout: int | None = None,
+        buffer: int = 10000,
+        related: Mapping[str, SObject] | None = None,
+        reaper: JobReaper | None = None,
+        operation: Operation = "query",
+    ):
+        columns = (
+            [f.name for f in sobject.fields if f.type not in EXCLUDED_TYPES]
+            if columns is None
+            else list(columns)
+        )
+        columns = [c for c in columns if getattr(c, "name", c) != "Id"]
+        if group_size < 1:
+            raise ValueError("group size must be at least 1")
+        self.reaper = reaper or JobReaper(client)
+        self.buffer = buffer
+        self.queries = [
+            SObjectQuery(
+                client,
+                sobject,
+                columns=["Id", *columns[n : n + group_size]],
+                where=where,
+                order_by="Id",
+                limit=limit,
+                page_size=page_size,
+                timeout=timeout,
+                related=related,
+                reaper=self.reaper,
+                operation=operation,
+            )
+            for n in range(0, max(len(columns), 1), group_size)
+        ]
+        self.columns = tuple(c for query in self.queries for c in query.columns[1:])
+        self.td = TypedDict("QueryDict", {"Id": str, **dict(self.columns)})
+        self.rows = None
+        self._entered = []
+
+    async def __aenter__(self):
+        if self._entered:
+            raise RuntimeError("context is not reentrant")
+        try:
+            for query in self.queries:  # create jobs, which run concurrently
+                await query.__aenter__()
+                self._entered.append(query)
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, *args):
+        if self.rows is not None:
+            await self.rows.aclose()
+        for query in self._entered:
+            await query.__aexit__(*args)
+
+    async def _prefetch(self, query: SObjectQuery, rows: asyncio.Queue):
+        try:
+            async for row in query:
+                await rows.put(row)
+        except Exception as e:
+            await rows.put(e)
+            return
+        await rows.put(None)
+
+    async def _merge(self) -> AsyncIterator[dict[str, Any]]:
+        """Join rows of each query job by Id, in a streaming merge."""
+        queues = [asyncio.Queue(self.buffer) for _ in self.queries]
+        tasks = [
+            asyncio.create_task(self._prefetch(query, queue))
+            for query, queue in zip(self.queries, queues)
+        ]
+
+        async def get(queue: asyncio.Queue) -> dict[str, Any] | None:
+            row = await queue.get()
+            if isinstance(row, Exception):
+                raise row
+            return row
+
+        try:
+            heads = [await get(queue) for queue in queues]
+            while any(head is not None for head in heads):
+                id = min(head["Id"] for head in heads if head is not None)
+                row = {"Id": id}
+                for n, query in enumerate(self.queries):
+                    if heads[n] is not None and heads[n]["Id"] == id:
+                        row.update(heads[n])
+                        heads[n] = await get(queues[n])
+                    else:
+                        row.update((name, None) for name, _ in query.columns[1:])
+                yield row
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __aiter__(self):
+        if not self._entered:
+            raise RuntimeError("must iterate within async context")
+        return self
 
     async def __anext__(self) -> dict[str, Any]:
-        if self.results is None:
-            await self._await_complete()
-        if self.results is None or (not self.results and self.cursor):
-            await self._next_page()
-        if not self.results and not self.cursor:
-            raise StopAsyncIteration
-        return self.codec.decode(self.results.popleft())
+        if self.rows is None:
+            self.rows = self._merge()
+        return await anext(self.rows)
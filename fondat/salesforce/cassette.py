@@ -0,0 +1,225 @@
+"""Fondat Salesforce HTTP exchange record and replay module."""
+
+import asyncio
+import base64
+import json
+import multidict
+
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from fondat.salesforce.oauth import Token
+from time import monotonic
+from typing import Any
+from urllib.parse import urlsplit
+
+
+_scrubbed_headers = {"authorization", "cookie", "set-cookie"}
+
+REPLAY_URL = "https://replay.invalid"  # instance URL of replayed exchanges
+
+
+def _path(url: str) -> str:
+    """Return the path and query of a URL, relative to the instance URL."""
+    split = urlsplit(url)
+    return f"{split.path}?{split.query}" if split.query else split.path
+
+
+def _scrub(value: Any, scrub: Mapping[str, str]) -> Any:
+    """Replace sensitive strings in a string, or in the strings of a JSON value."""
+    if isinstance(value, str):
+        for secret, replacement in scrub.items():
+            value = value.replace(secret, replacement)
+        return value
+    if isinstance(value, Mapping):
+        return {_scrub(k, scrub): _scrub(v, scrub) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_scrub(v, scrub) for v in value]
+    return value
+
+
+def _key(method: str, path: str, params: Mapping[str, str] | None, body: Any) -> str:
+    """Return the key that matches a replayed request to recorded exchanges."""
+    return json.dumps([method, path, sorted((params or {}).items()), body], sort_keys=True)
+
+
+class _Content:
+    """Stream reader of a replayed response body."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        for offset in range(0, len(self.body), n):
+            yield self.body[offset : offset + n]
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class _Response:
+    """Response of a recorded or replayed exchange, with its body read in full."""
+
+    def __init__(self, status: int, headers: Mapping[str, str], body: bytes):
+        self.status = status
+        self.headers = multidict.CIMultiDictProxy(multidict.CIMultiDict(headers))
+        self.body = body
+        self.content = _Content(body)
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self) -> str:
+        return self.body.decode()
+
+    async def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+class Recorder:
+    """
+    Records HTTP exchanges made by a client into a cassette file, for replay.
+
+    Parameters:
+    • session: client session to use to make HTTP requests
+    • path: path of cassette file to write
+    • scrub: mapping of sensitive strings to replacements  [no replacements]
+
+    A recorder is supplied to Client.create in place of a client session. Exchanges are
+    appended to the cassette file as JSON lines, each with its elapsed time. URLs are
+    recorded relative to the instance URL. Authorization and cookie headers are not recorded,
+    nor are authentication requests, which are passed through to the session. Each scrub
+    string is replaced in recorded paths, parameters, headers, and request and response
+    bodies. A replacement should not contain the string it replaces.
+
+    Response bodies are read in full before they are returned to the client.
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        path: str,
+        *,
+        scrub: Mapping[str, str] | None = None,
+    ):
+        self.session = session
+        self.path = path
+        self.scrub = dict(scrub or {})
+        self.file = open(path, "a")
+
+    def _scrub(self, value: Any) -> Any:
+        return _scrub(value, self.scrub)
+
+    def post(self, *args, **kwargs):
+        """Perform an authentication request, without recording it."""
+        return self.session.post(*args, **kwargs)
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator[_Response]:
+        """Perform an HTTP request, recording the exchange."""
+        start = monotonic()
+        async with self.session.request(method=method, url=url, **kwargs) as response:
+            body = await response.read()
+            elapsed = monotonic() - start
+            headers = {
+                k: self._scrub(v)
+                for k, v in response.headers.items()
+                if k.lower() not in _scrubbed_headers
+            }
+            try:
+                text, encoding = self._scrub(body.decode()), None
+            except UnicodeDecodeError:
+                text, encoding = base64.b64encode(body).decode(), "base64"
+            exchange = {
+                "method": method,
+                "path": self._scrub(_path(url)),
+                "params": self._scrub(kwargs.get("params") or {}),
+                "json": self._scrub(kwargs.get("json")),
+                "status": response.status,
+                "headers": headers,
+                "body": text,
+                "encoding": encoding,
+                "elapsed": elapsed,
+            }
+            self.file.write(json.dumps(exchange) + "\n")
+            self.file.flush()
+            yield _Response(response.status, headers, body)
+
+    def close(self) -> None:
+        """Close the cassette file."""
+        self.file.close()
+
+
+class Player:
+    """
+    Replays HTTP exchanges from a cassette file, without network access.
+
+    Parameters:
+    • path: path of cassette file to read
+    • speed: factor by which to scale recorded timing  [no delay]
+    • scrub: mapping of sensitive strings to replacements used to record cassette
+
+    A player is supplied to Client.create in place of a client session, along with its
+    authenticate method. Each request is matched to a recorded exchange with the same method,
+    path, parameters and JSON body, scrubbed with the same mapping used to record the
+    cassette. Identical requests (e.g. polling a job's state) are answered with their
+    recorded responses in order; once exhausted, the last response is repeated. If no
+    recorded exchange matches, an exception is raised. Replayed responses contain scrubbed
+    values.
+
+    With a speed of 1, each response is delayed by its recorded elapsed time; with a speed
+    of 2, by half its elapsed time; and so on. This allows the timing of bulk query result
+    pages and other paths to be reproduced when profiling.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        speed: float | None = None,
+        scrub: Mapping[str, str] | None = None,
+    ):
+        self.speed = speed
+        self.scrub = dict(scrub or {})
+        self.exchanges = defaultdict(deque)
+        with open(path) as file:
+            for line in file:
+                exchange = json.loads(line)
+                key = _key(
+                    exchange["method"], exchange["path"], exchange["params"], exchange["json"]
+                )
+                self.exchanges[key].append(exchange)
+
+    async def authenticate(self, session: Any) -> Token:
+        """Return an access token for the replay instance URL."""
+        return Token(
+            access_token="replay",
+            signature="",
+            scope=None,
+            instance_url=REPLAY_URL,
+            id=f"{REPLAY_URL}/id/replay/replay",
+            token_type="Bearer",
+            issued_at="",
+            refresh_token=None,
+            state=None,
+        )
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator[_Response]:
+        """Return the recorded response to an HTTP request."""
+        key = _key(
+            method,
+            _scrub(_path(url), self.scrub),
+            _scrub(kwargs.get("params") or {}, self.scrub),
+            _scrub(kwargs.get("json"), self.scrub),
+        )
+        exchanges = self.exchanges.get(key)
+        if not exchanges:
+            raise LookupError(f"no recorded exchange: {method} {url}")
+        exchange = exchanges.popleft() if len(exchanges) > 1 else exchanges[0]
+        if self.speed:
+            await asyncio.sleep(exchange["elapsed"] / self.speed)
+        body = exchange["body"].encode()
+        if exchange["encoding"] == "base64":
+            body = base64.b64decode(body)
+        yield _Response(exchange["status"], exchange["headers"], body)
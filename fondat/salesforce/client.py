@@ -5,14 +5,29 @@ import asyncio
 import fondat.error
 import logging
 
-from collections.abc import Callable, Coroutine
+from collections.abc import Callable, Coroutine, Mapping
 from contextlib import asynccontextmanager
+from fondat.codec import JSONCodec
 from typing import Any, Literal
 
 
 _logger = logging.getLogger(__name__)
 
 
+class _Flight:
+    """An in-flight request, shared by coalesced callers."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+def _freeze(mapping: Mapping[str, str] | None) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted(mapping.items())) if mapping else ()
+
+
 class Client:
     """
     Salesforce API client.
@@ -27,6 +42,7 @@ class Client:
         version: str,
         authenticate: Callable[[], Coroutine[Any, Any, Any]],
         retries: int = 3,
+        coalesce: bool = False,
     ):
         """
         Create a Salesforce API client.
@@ -36,6 +52,7 @@ class Client:
         • version: API version to use; example: "54.0"
         • authenticate: coroutine function to authenticate and return an access token
         • retries: number of times to retry server errors
+        • coalesce: coalesce concurrent identical GET requests
 
         Server error retries backoff exponentially.
         """
@@ -47,7 +64,9 @@ class Client:
         self.version = version
         self.authenticate = authenticate
         self.retries = retries
+        self.coalesce = coalesce
         self.token = None
+        self._flights = {}
         self.resources = await service_resource(self).resources()
 
         return self
@@ -59,6 +78,58 @@ class Client:
         except KeyError:
             raise fondat.error.NotFoundError(f"unknown resource: {resource}")
 
+    async def get(
+        self,
+        path: str,
+        *,
+        headers: dict[str, str] | None = None,
+        params: dict[str, str] | None = None,
+        python_type: Any = Any,
+    ) -> Any:
+        """
+        Make an HTTP GET request to a Salesforce API resource, and return its JSON response
+        body, decoded into the specified Python type.
+
+        Parameters:
+        • path: request path, relative to instance URL
+        • headers: HTTP headers to include in request
+        • params: query parameters to include in request
+        • python_type: type to decode JSON response body into
+
+        If the client coalesces requests, concurrent calls with the same path, headers,
+        parameters and Python type share a single in-flight request and its decoded result,
+        which should not be modified. The shared request is only cancelled when all of its
+        callers are cancelled.
+        """
+
+        async def get():
+            async with self.request("GET", path, headers=headers, params=params) as response:
+                return JSONCodec.get(python_type).decode(await response.json())
+
+        if not self.coalesce:
+            return await get()
+        key = (path, _freeze(headers), _freeze(params), python_type)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.create_task(get()))
+
+            def land(task):
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+            flight.task.add_done_callback(land)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():  # last caller
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
     @asynccontextmanager
     async def request(
         self,
@@ -68,6 +139,7 @@ class Client:
         headers: dict[str, str] | None = None,
         params: dict[str, str] | None = None,
         json: Any = None,
+        data: Any = None,
     ) -> Any:
         """
         Make an HTTP request to a Salesforce API resource.
@@ -78,12 +150,17 @@ class Client:
         • headers: HTTP headers to include in request
         • params: query parameters to include in request
         • json: JSON body data to include in request
+        • data: body data to include in request; bytes, or a streaming payload
+
+        A request with a streaming body (e.g. an async iterable or multipart payload) cannot
+        be resent, and so is not retried.
         """
 
         headers = {"Accept": "application/json", "Accept-Encoding": "gzip"} | (headers or {})
 
         auth_error = False
         server_errors = 0
+        retryable = data is None or isinstance(data, (bytes, str))
 
         while True:
             if not self.token:
@@ -96,18 +173,21 @@ class Client:
                 headers=headers,
                 params=params,
                 json=json,
+                data=data,
                 compress=bool(json),
             ) as response:
                 _logger.debug("%s %s %d", method, url, response.status)
                 if 200 <= response.status <= 299:
                     yield response
                     return
-                elif response.status == 401 and not auth_error:  # only retry once
+                elif response.status == 401 and not auth_error and retryable:  # only once
                     _logger.debug("retrying authentication")
                     auth_error = True
                     self.token = None
                     continue
-                elif 500 <= response.status <= 599 and server_errors < self.retries:
+                elif (
+                    500 <= response.status <= 599 and server_errors < self.retries and retryable
+                ):
                     _logger.debug(f"retrying server error")
                     await asyncio.sleep(2**server_errors)
                     server_errors += 1
@@ -0,0 +1,299 @@
+"""
+Fondat Salesforce sObject model code generation module.
+
+Generates an importable Python module of precompiled sObject models from object describes:
+
+    python -m fondat.salesforce.codegen --version 57.0 --output models.py Account Contact
+
+Drift of the models in a generated module against the live schema can be checked with:
+
+    python -m fondat.salesforce.codegen --version 57.0 --check models
+
+The org is accessed through a refresh token, supplied in the FONDAT_SALESFORCE_CLIENT_ID,
+FONDAT_SALESFORCE_CLIENT_SECRET and FONDAT_SALESFORCE_REFRESH_TOKEN environment variables.
+"""
+
+import aiohttp
+import argparse
+import asyncio
+import importlib
+import keyword
+import os
+import sys
+
+from collections.abc import Iterable, Mapping
+from datetime import date, datetime
+from fondat.codec import JSONCodec
+from fondat.salesforce.bulk import EXCLUDED_TYPES
+from fondat.salesforce.client import Client
+from fondat.salesforce.metadata import FieldInfo, SObjectInfo, describe_sobjects
+from fondat.salesforce.oauth import refresh_authenticator
+from fondat.salesforce.sobjects import (
+    Address,
+    Location,
+    SObject,
+    field_base_type,
+    sobjects_metadata_resource,
+)
+from typing import Any
+
+
+_type_names = {  # type annotations, with module-level names aliased in generated module
+    Address: "_sobjects.Address",
+    Any: "_typing.Any",
+    bool: "bool",
+    bytes: "bytes",
+    date: "_datetime.date",
+    datetime: "_datetime.datetime",
+    float: "float",
+    int: "int",
+    Location: "_sobjects.Location",
+    str: "str",
+}
+
+_reserved_names = {"VERSION", "bool", "bytes", "float", "int", "str"}
+
+_field_keys = (
+    "name",
+    "label",
+    "type",
+    "length",
+    "precision",
+    "scale",
+    "relationshipName",
+    "compoundFieldName",
+)
+
+_drift_attributes = (
+    "type",
+    "length",
+    "precision",
+    "scale",
+    "referenceTo",
+    "relationshipName",
+    "picklistValues",
+)
+
+
+class Model(SObjectInfo):
+    """
+    Precompiled model of a Salesforce object, generated by this module.
+
+    Parameters:
+    • datacls: data class of object records
+    • describe: snapshot of object describe, containing compact metadata
+
+    A model is compact object metadata, allowing it to be used in place of object metadata
+    (e.g. with bulk.SObjectQuery), along with the data class of its records. It can be
+    supplied to sobject_data_resource in place of an object name, avoiding describe requests
+    at start-up.
+    """
+
+    __slots__ = ("datacls", "columns", "_codec")
+
+    def __init__(self, datacls: type, describe: Mapping[str, Any]):
+        super().__init__(describe)
+        self.datacls = datacls
+        self.columns = tuple(f.name for f in self.fields if f.type not in EXCLUDED_TYPES)
+        self._codec = None
+
+    @property
+    def codec(self) -> JSONCodec:
+        """JSON codec of the record data class."""
+        if self._codec is None:
+            self._codec = JSONCodec.get(self.datacls)
+        return self._codec
+
+    def __repr__(self):
+        return f"Model(name={self.name!r})"
+
+
+def _flags(names: Iterable[str], json: Mapping[str, Any]) -> dict[str, bool]:
+    return {name: True for name in names if json.get(name)}
+
+
+def snapshot(describe: SObject | Mapping[str, Any]) -> dict[str, Any]:
+    """Return a snapshot of an object describe, containing only compact metadata."""
+    if isinstance(describe, SObject):
+        describe = JSONCodec.get(SObject).encode(describe)
+    fields = []
+    for field in describe["fields"]:
+        values = {k: field[k] for k in _field_keys if field.get(k) not in (None, 0)}
+        if field.get("referenceTo"):
+            values["referenceTo"] = list(field["referenceTo"])
+        if picklist := [p["value"] for p in field.get("picklistValues") or () if p["active"]]:
+            values["picklistValues"] = [{"value": v, "active": True} for v in picklist]
+        values.update(_flags(FieldInfo._flag_names, field))
+        fields.append(values)
+    result = {k: describe[k] for k in ("name", "label", "keyPrefix") if describe.get(k)}
+    result.update(_flags(SObjectInfo._flag_names, describe))
+    result["fields"] = fields
+    return result
+
+
+def _annotation(field: FieldInfo) -> str:
+    """Return the type annotation of a field in a record data class."""
+    if field.type == "base64":
+        return "str | None"  # path of content
+    result = _type_names[field_base_type(field.type)]
+    if field.length != 0:
+        result = f"_typing.Annotated[{result}, _validation.MaxLen({field.length})]"
+    return f"{result} | None"
+
+
+def _source(describe: Mapping[str, Any]) -> str:
+    """Return the source of the record data class and model of an object describe."""
+    info = SObjectInfo(describe)
+    lines = ["", "", "@_data.datacls", f"class {info.name}:"]
+    lines.extend(f"    {field.name}: {_annotation(field)}" for field in info.fields)
+    lines.extend(["", "", f"{info.name} = _codegen.Model(", f"    {info.name},", "    {"])
+    for key, value in describe.items():
+        if key != "fields":
+            lines.append(f"        {key!r}: {value!r},")
+    lines.append("        'fields': [")
+    lines.extend(f"            {field!r}," for field in describe["fields"])
+    lines.extend(["        ],", "    },", ")"])
+    return "\n".join(lines)
+
+
+def module_source(describes: Iterable[SObject | Mapping[str, Any]], *, version: str) -> str:
+    """
+    Return the source of a module of precompiled models of Salesforce objects.
+
+    Parameters:
+    • describes: describes of objects to generate models of
+    • version: API version of describes
+
+    Each model in the module is named after the object it models, and has the data class of
+    its records in its datacls attribute. Other module-level names are prefixed with an
+    underscore, except VERSION; an object name that is not a valid identifier, or that
+    collides with another name in the module, raises ValueError.
+    """
+    describes = [snapshot(describe) for describe in describes]
+    names = set()
+    for describe in describes:
+        name = describe["name"]
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith("_"):
+            raise ValueError(f"invalid model name: {name}")
+        if name in _reserved_names or name in names:
+            raise ValueError(f"model name collides with module-level name: {name}")
+        names.add(name)
+    lines = [
+        '"""Salesforce object models, generated by fondat.salesforce.codegen."""',
+        "",
+        "# fmt: off",
+        "# Generated code; do not edit. Regenerate to update.",
+        "",
+        "import datetime as _datetime",
+        "import fondat.data as _data",
+        "import fondat.salesforce.codegen as _codegen",
+        "import fondat.salesforce.sobjects as _sobjects",
+        "import fondat.validation as _validation",
+        "import typing as _typing",
+        "",
+        "",
+        f"VERSION = {version!r}",
+    ]
+    lines.extend(_source(describe) for describe in describes)
+    return "\n".join(lines) + "\n"
+
+
+async def generate(client: Client, names: Iterable[str]) -> str:
+    """
+    Describe Salesforce objects, returning the source of a module of their precompiled
+    models.
+
+    Parameters:
+    • client: client object through which to describe objects
+    • names: names of objects to generate models of
+    """
+    resource = sobjects_metadata_resource(client)
+    describes = await asyncio.gather(*(resource[name].describe() for name in names))
+    return module_source(describes, version=client.version)
+
+
+def _drift(model: SObjectInfo, live: SObjectInfo) -> list[str]:
+    result = []
+    fields = {field.name: field for field in model.fields}
+    live_fields = {field.name: field for field in live.fields}
+    for name in live_fields.keys() - fields.keys():
+        result.append(f"{name}: field added")
+    for name in fields.keys() - live_fields.keys():
+        result.append(f"{name}: field removed")
+    for name in fields.keys() & live_fields.keys():
+        for attribute in _drift_attributes:
+            was = getattr(fields[name], attribute)
+            now = getattr(live_fields[name], attribute)
+            if was != now:
+                result.append(f"{name}: {attribute} changed from {was!r} to {now!r}")
+        if fields[name]._flags != live_fields[name]._flags:
+            result.append(f"{name}: properties changed")
+    return sorted(result)
+
+
+async def check_drift(client: Client, models: Iterable[Model]) -> dict[str, list[str]]:
+    """
+    Check precompiled models against the live schema, returning descriptions of differences,
+    keyed by object name. Objects without differences are omitted.
+
+    Parameters:
+    • client: client object through which to describe objects
+    • models: models to check
+
+    Differences are fields added or removed, and changes of field types, lengths, precision,
+    scale, references, active picklist values and properties.
+    """
+    models = {model.name: model for model in models}
+    store = await describe_sobjects(client, models.keys())
+    result = {}
+    for name, model in models.items():
+        if drift := _drift(model, store[name]):
+            result[name] = drift
+    return result
+
+
+async def _main(args: argparse.Namespace) -> int:
+    env = os.environ
+    authenticate = refresh_authenticator(
+        endpoint=args.endpoint,
+        client_id=env["FONDAT_SALESFORCE_CLIENT_ID"],
+        client_secret=env["FONDAT_SALESFORCE_CLIENT_SECRET"],
+        refresh_token=env["FONDAT_SALESFORCE_REFRESH_TOKEN"],
+    )
+    async with aiohttp.ClientSession() as session:
+        client = await Client.create(
+            session=session, version=args.version, authenticate=authenticate
+        )
+        if args.check:
+            module = importlib.import_module(args.check)
+            models = [v for v in vars(module).values() if isinstance(v, SObjectInfo)]
+            drift = await check_drift(client, models)
+            for name, differences in drift.items():
+                for difference in differences:
+                    print(f"{name}.{difference}")
+            return 1 if drift else 0
+        source = await generate(client, args.sobjects)
+    with open(args.output, "w") as file:
+        file.write(source)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the code generator command line interface."""
+    parser = argparse.ArgumentParser(
+        prog="python -m fondat.salesforce.codegen",
+        description="Generate precompiled Salesforce object models, or check their drift.",
+    )
+    parser.add_argument("sobjects", nargs="*", metavar="SOBJECT", help="objects to model")
+    parser.add_argument("--version", required=True, help='API version; example: "57.0"')
+    parser.add_argument("--output", "-o", help="path of module file to generate")
+    parser.add_argument("--check", metavar="MODULE", help="generated module to check drift of")
+    parser.add_argument("--endpoint", default="https://login.salesforce.com")
+    args = parser.parse_args(argv)
+    if not args.check and not (args.output and args.sobjects):
+        parser.error("objects and output are required, unless checking drift")
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""Fondat Salesforce composite module."""
+
+import asyncio
+import itertools
+import re
+
+from collections.abc import Iterable, Mapping
+from fondat.codec import JSONCodec
+from fondat.data import datacls
+from fondat.resource import mutation, resource
+from fondat.salesforce.client import Client
+from typing import Any, Literal
+
+
+BATCH_LIMIT = 25  # maximum number of subrequests in a batch request
+COMPOSITE_LIMIT = 25  # maximum number of subrequests in a composite request
+GRAPH_LIMIT = 500  # maximum number of nodes in a composite graph request
+COLLECTION_LIMIT = 200  # maximum number of records in an sObject collection request
+
+
+Method = Literal["GET", "PUT", "POST", "DELETE", "PATCH"]
+
+
+@datacls
+class BatchRequest:
+    method: Method
+    url: str
+    richInput: Any | None
+
+
+@datacls
+class BatchResult:
+    statusCode: int
+    result: Any | None
+
+
+@datacls
+class _BatchRequests:
+    batchRequests: list[BatchRequest]
+    haltOnError: bool
+
+
+@datacls
+class _BatchResponse:
+    hasErrors: bool
+    results: list[BatchResult]
+
+
+@datacls
+class SaveResult:
+    id: str | None
+    success: bool
+    errors: list[Any]
+    created: bool | None
+
+
+@datacls
+class _CollectionRequest:
+    allOrNone: bool
+    records: list[dict[str, Any]]
+
+
+@datacls
+class SubRequest:
+    method: Method
+    url: str
+    referenceId: str
+    body: Any | None
+
+
+@datacls
+class SubResponse:
+    referenceId: str
+    httpStatusCode: int
+    httpHeaders: dict[str, str] | None
+    body: Any | None
+
+
+@datacls
+class _CompositeRequest:
+    allOrNone: bool
+    collateSubrequests: bool
+    compositeRequest: list[SubRequest]
+
+
+@datacls
+class _CompositeResponse:
+    compositeResponse: list[SubResponse]
+
+
+@datacls
+class _Graph:
+    graphId: str
+    compositeRequest: list[SubRequest]
+
+
+@datacls
+class _GraphRequest:
+    graphs: list[_Graph]
+
+
+@datacls
+class _GraphResult:
+    graphId: str
+    graphResponse: _CompositeResponse
+    isSuccessful: bool
+
+
+@datacls
+class _GraphResponse:
+    graphs: list[_GraphResult]
+
+
+_references = re.compile(r"@\{([A-Za-z0-9_]+)[.\[]")
+
+
+class Reference(str):
+    """
+    Reference to the result of a composite subrequest, for use in subsequent subrequests.
+
+    The value of the reference is an expression that evaluates to the "id" property of the
+    subrequest response body (e.g. "@{ref1.id}"). The field method returns an expression to
+    reference another property.
+    """
+
+    def __new__(cls, reference_id: str):
+        self = super().__new__(cls, f"@{{{reference_id}.id}}")
+        self.reference_id = reference_id
+        return self
+
+    def field(self, name: str) -> str:
+        """Return an expression referencing a property of the subrequest response body."""
+        return f"@{{{self.reference_id}.{name}}}"
+
+
+class Composite:
+    """
+    Builds and executes dependent subrequests in one or a few round trips, through composite
+    or composite graph requests.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • all_or_none: roll back all subrequests if any subrequest fails
+    • graph: execute as composite graph requests
+
+    Subrequests are added through the add method or its sObject convenience methods, each of
+    which returns a Reference that can be embedded in subsequent subrequest URLs or bodies.
+
+    A composite request is limited to 25 subrequests. In a composite graph, subrequests that
+    reference each other are placed in the same graph; graphs are limited to 500 nodes. If the
+    subrequests exceed a single graph, they are split along unrelated groups of subrequests
+    into multiple graphs, which are executed concurrently. Each graph is executed in its own
+    transaction; all_or_none only applies to composite requests.
+    """
+
+    def __init__(self, client: Client, *, all_or_none: bool = False, graph: bool = False):
+        self.client = client
+        self.all_or_none = all_or_none
+        self.graph = graph
+        self.requests: list[SubRequest] = []
+        self.types: dict[str, Any] = {}
+        self._ids = itertools.count(1)
+
+    def add(
+        self,
+        method: Method,
+        url: str,
+        *,
+        body: Any = None,
+        type: Any = None,
+        reference_id: str | None = None,
+    ) -> Reference:
+        """
+        Add a subrequest.
+
+        Parameters:
+        • method: HTTP request method
+        • url: request path, relative to instance URL
+        • body: JSON body data to include in request
+        • type: type to decode successful response body into  [undecoded]
+        • reference_id: identifier of the subrequest  [generated]
+        """
+        reference_id = reference_id or f"ref{next(self._ids)}"
+        if reference_id in self.types:
+            raise ValueError(f"duplicate reference id: {reference_id}")
+        self.requests.append(
+            SubRequest(method=method, url=url, referenceId=reference_id, body=body)
+        )
+        self.types[reference_id] = type
+        return Reference(reference_id)
+
+    def _sobject_path(self, sobject: str, id: str | None = None) -> str:
+        path = f"{self.client.resources['sobjects']}/{sobject}"
+        return f"{path}/{id}" if id else path
+
+    @staticmethod
+    def _encode(record: Any) -> Any:
+        return (
+            record
+            if isinstance(record, Mapping)
+            else JSONCodec.get(type(record)).encode(record)
+        )
+
+    def create(self, sobject: str, record: Any, **kwargs) -> Reference:
+        """Add a subrequest to create a record; record is a mapping or a data class instance."""
+        path = self._sobject_path(sobject)
+        body = self._encode(record)
+        return self.add("POST", path, body=body, type=SaveResult, **kwargs)
+
+    def update(self, sobject: str, id: str, record: Any, **kwargs) -> Reference:
+        """Add a subrequest to update a record; record is a mapping or a data class instance."""
+        body = self._encode(record)
+        return self.add("PATCH", self._sobject_path(sobject, id), body=body, **kwargs)
+
+    def get(self, sobject: str, id: str, type: Any = None, **kwargs) -> Reference:
+        """Add a subrequest to get a record, optionally decoded into the specified type."""
+        return self.add("GET", self._sobject_path(sobject, id), type=type, **kwargs)
+
+    def delete(self, sobject: str, id: str, **kwargs) -> Reference:
+        """Add a subrequest to delete a record."""
+        return self.add("DELETE", self._sobject_path(sobject, id), **kwargs)
+
+    def _decode(self, responses: Iterable[SubResponse]) -> dict[str, SubResponse]:
+        results = {}
+        for response in responses:
+            type = self.types.get(response.referenceId)
+            if type and response.body is not None and 200 <= response.httpStatusCode <= 299:
+                response.body = JSONCodec.get(type).decode(response.body)
+            results[Reference(response.referenceId)] = response
+        return results
+
+    def _graphs(self) -> list[list[SubRequest]]:
+        """Partition subrequests into graphs of related subrequests, in order."""
+        parents = {r.referenceId: r.referenceId for r in self.requests}
+
+        def find(id):
+            while parents[id] != id:
+                parents[id] = id = parents[parents[id]]
+            return id
+
+        for request in self.requests:
+            text = JSONCodec.get(Any).encode([request.url, request.body])
+            for reference_id in _references.findall(str(text)):
+                if reference_id in parents:
+                    parents[find(reference_id)] = find(request.referenceId)
+        components = {}
+        for request in self.requests:
+            components.setdefault(find(request.referenceId), []).append(request)
+        graphs = []
+        for component in components.values():
+            if len(component) > GRAPH_LIMIT:
+                raise ValueError(f"related subrequests exceed {GRAPH_LIMIT} nodes")
+            for graph in graphs:  # first fit
+                if len(graph) + len(component) <= GRAPH_LIMIT:
+                    graph.extend(component)
+                    break
+            else:
+                graphs.append(list(component))
+        order = {r.referenceId: n for n, r in enumerate(self.requests)}
+        return [sorted(graph, key=lambda r: order[r.referenceId]) for graph in graphs]
+
+    async def execute(self) -> dict[Reference, SubResponse]:
+        """
+        Execute the subrequests. Returns a mapping of subrequest reference to response. The
+        body of a successful response is decoded into its subrequest type, if specified.
+        """
+        path = self.client.resources["composite"]
+        if not self.graph:
+            if len(self.requests) > COMPOSITE_LIMIT:
+                raise ValueError(f"composite request exceeds {COMPOSITE_LIMIT} subrequests")
+            request = _CompositeRequest(
+                allOrNone=self.all_or_none,
+                collateSubrequests=False,
+                compositeRequest=self.requests,
+            )
+            async with self.client.request(
+                method="POST", path=path, json=JSONCodec.get(_CompositeRequest).encode(request)
+            ) as response:
+                json = await response.json()
+            return self._decode(
+                JSONCodec.get(_CompositeResponse).decode(json).compositeResponse
+            )
+
+        async def execute(graph_id: str, graph: list[SubRequest]):
+            request = _GraphRequest(graphs=[_Graph(graphId=graph_id, compositeRequest=graph)])
+            async with self.client.request(
+                method="POST",
+                path=f"{path}/graph",
+                json=JSONCodec.get(_GraphRequest).encode(request),
+            ) as response:
+                json = await response.json()
+            return JSONCodec.get(_GraphResponse).decode(json).graphs
+
+        results = {}
+        for graphs in await asyncio.gather(
+            *(execute(f"graph{n}", graph) for n, graph in enumerate(self._graphs(), 1))
+        ):
+            for graph in graphs:
+                results |= self._decode(graph.graphResponse.compositeResponse)
+        return results
+
+
+def composite_resource(client: Client):
+    """Return resource representing composite requests."""
+
+    path = client.resources["composite"]
+
+    @resource
+    class CompositeResource:
+        """..."""
+
+        @mutation
+        async def batch(
+            self, requests: list[BatchRequest], halt_on_error: bool = False
+        ) -> list[BatchResult]:
+            """
+            Execute up to 25 independent subrequests in a single request.
+
+            Subrequest URLs are relative to "/services/data/"; example: "v57.0/limits".
+            Results are returned in the same order as subrequests.
+            """
+
+            if len(requests) > BATCH_LIMIT:
+                raise ValueError(f"batch exceeds {BATCH_LIMIT} subrequests")
+            body = _BatchRequests(batchRequests=requests, haltOnError=halt_on_error)
+            async with client.request(
+                method="POST",
+                path=f"{path}/batch",
+                json=JSONCodec.get(_BatchRequests).encode(body),
+            ) as response:
+                return JSONCodec.get(_BatchResponse).decode(await response.json()).results
+
+        async def _collection(
+            self, method: str, path: str, records: list[dict[str, Any]], all_or_none: bool
+        ) -> list[SaveResult]:
+            if len(records) > COLLECTION_LIMIT:
+                raise ValueError(f"collection exceeds {COLLECTION_LIMIT} records")
+            body = _CollectionRequest(allOrNone=all_or_none, records=records)
+            async with client.request(
+                method=method, path=path, json=JSONCodec.get(_CollectionRequest).encode(body)
+            ) as response:
+                return JSONCodec.get(list[SaveResult]).decode(await response.json())
+
+        @mutation
+        async def create(
+            self, records: list[dict[str, Any]], all_or_none: bool = False
+        ) -> list[SaveResult]:
+            """
+            Create up to 200 records in a single request. Each record must contain an
+            "attributes" object with the "type" of the record. Results are returned in the
+            same order as records.
+            """
+            return await self._collection("POST", f"{path}/sobjects", records, all_or_none)
+
+        @mutation
+        async def update(
+            self, records: list[dict[str, Any]], all_or_none: bool = False
+        ) -> list[SaveResult]:
+            """
+            Update up to 200 records in a single request. Each record must contain an
+            "attributes" object with the "type" of the record, and its "Id". Results are
+            returned in the same order as records.
+            """
+            return await self._collection("PATCH", f"{path}/sobjects", records, all_or_none)
+
+        @mutation
+        async def upsert(
+            self,
+            sobject: str,
+            external_id: str,
+            records: list[dict[str, Any]],
+            all_or_none: bool = False,
+        ) -> list[SaveResult]:
+            """
+            Create or update up to 200 records of an object in a single request, matching
+            existing records by an external ID field. Each record must contain an "attributes"
+            object with the "type" of the record. Results are returned in the same order as
+            records.
+            """
+            return await self._collection(
+                "PATCH", f"{path}/sobjects/{sobject}/{external_id}", records, all_or_none
+            )
+
+    return CompositeResource()
@@ -0,0 +1,217 @@
+"""Fondat Salesforce GraphQL module."""
+
+import fondat.error
+
+from collections import namedtuple
+from collections.abc import AsyncIterator, Iterable, Mapping
+from fondat.codec import JSONCodec
+from fondat.resource import mutation, resource
+from fondat.salesforce.bulk import EXCLUDED_TYPES, resolve_path
+from fondat.salesforce.client import Client
+from fondat.salesforce.sobjects import SObject, sobject_field_type
+from typing import Any
+
+
+def graphql_resource(client: Client):
+    """Return resource representing the UI API GraphQL endpoint."""
+
+    path = f"/services/data/v{client.version}/graphql"
+
+    @resource
+    class GraphQLResource:
+        """..."""
+
+        @mutation
+        async def query(
+            self, query: str, variables: dict[str, Any] | None = None
+        ) -> dict[str, Any]:
+            """
+            Perform a GraphQL query, returning its data. If the response contains errors,
+            an exception is raised.
+            """
+            body = {"query": query, "variables": variables or {}}
+            async with client.request(method="POST", path=path, json=body) as response:
+                json = await response.json()
+            if errors := json.get("errors"):
+                raise fondat.error.BadRequestError(
+                    "; ".join(error.get("message", str(error)) for error in errors)
+                )
+            return json["data"]
+
+    return GraphQLResource()
+
+
+class _Selection:
+    """Selection of fields of an object, validated against its metadata."""
+
+    def __init__(self, sobject: SObject, fields: Iterable[str], related: Mapping[str, SObject]):
+        self.sobject = sobject
+        self.fields = []  # (path, codec) of each selected field
+        tree = {}  # nested selection of fields, including parent relationships
+        for name in fields:
+            path = name.split(".")
+            field = resolve_path(sobject, related, path)
+            if not field:
+                raise ValueError(f"unknown field: {name}")
+            if field.type in EXCLUDED_TYPES:
+                raise ValueError(f"cannot query {field.type} type field: {name}")
+            node = tree
+            sobjects = [sobject]
+            for relationship in path[:-1]:
+                references = [
+                    f
+                    for s in sobjects
+                    for f in s.fields
+                    if f.type == "reference" and f.relationshipName == relationship
+                ]
+                if len(references[0].referenceTo or ()) > 1:
+                    raise ValueError(f"polymorphic relationship not supported: {name}")
+                sobjects = [related[references[0].referenceTo[0]]]
+                node = node.setdefault(relationship, {})
+            node[path[-1]] = None
+            self.fields.append((path, JSONCodec.get(sobject_field_type(field))))
+        self.tree = tree
+
+    def render(self, tree: Mapping[str, Any] | None = None) -> str:
+        """Return the selection as GraphQL fields; Id fields are scalars, others have values."""
+        selected = []
+        for name, subtree in (self.tree if tree is None else tree).items():
+            if subtree:
+                selected.append(f"{name} {{ {self.render(subtree)} }}")
+            elif name == "Id":
+                selected.append(name)
+            else:
+                selected.append(f"{name} {{ value }}")
+        return " ".join(selected)
+
+    def decode(self, node: Mapping[str, Any]) -> dict[str, Any]:
+        result = {}
+        for path, codec in self.fields:
+            value = node
+            for name in path[:-1]:
+                value = value.get(name) if value is not None else None
+            value = value.get(path[-1]) if value is not None else None
+            if isinstance(value, Mapping):
+                value = value.get("value")
+            result[".".join(path)] = codec.decode(value) if value is not None else None
+        return result
+
+
+class GraphQLQuery:
+    """
+    Queries records along with related child records, in a single round trip, through the
+    UI API GraphQL endpoint.
+
+    Parameters:
+    • client: client object through which to perform queries
+    • sobject: Salesforce object metadata
+    • fields: fields to select, including parent relationship paths (e.g. "Owner.Name")
+    • children: child records to select with each record
+    • where: GraphQL filter of records; example: {"Name": {"like": "A%"}}
+    • order_by: GraphQL ordering of records; example: {"Name": {"order": "ASC"}}
+    • page_size: number of records to retrieve per request
+    • related: metadata of parent and child objects, keyed by object name
+
+    Fields are validated against object metadata, and their values are decoded to types
+    according to field metadata, as in SObjectQuery. Each child selection is by child
+    relationship name (e.g. "Opportunities"); child records are returned as a list of
+    dictionaries in the record dictionary, keyed by relationship name. Only the first page of
+    child records is returned; use the first attribute to limit their number.
+
+    Iterating over the query yields records, retrieving subsequent pages of records by cursor
+    as required.
+    """
+
+    Children = namedtuple(
+        "Children",
+        "relationship, fields, where, order_by, first",
+        defaults=(("Id",), None, None, 10),
+    )
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: SObject,
+        *,
+        fields: Iterable[str] = ("Id",),
+        children: Iterable[Children] = (),
+        where: Mapping[str, Any] | None = None,
+        order_by: Mapping[str, Any] | None = None,
+        page_size: int = 100,
+        related: Mapping[str, SObject] | None = None,
+    ):
+        self.client = client
+        related = related or {}
+        self.selection = _Selection(sobject, fields, related)
+        self.variables = {"first": page_size}
+        declarations = ["$first: Int", "$after: String"]
+        args = ["first: $first", "after: $after"]
+        if where:
+            self.variables["where"] = where
+            declarations.append(f"$where: {sobject.name}_Filter")
+            args.append("where: $where")
+        if order_by:
+            self.variables["orderBy"] = order_by
+            declarations.append(f"$orderBy: {sobject.name}_OrderBy")
+            args.append("orderBy: $orderBy")
+        relationships = {
+            r.relationshipName: r
+            for r in getattr(sobject, "childRelationships", None) or ()
+            if r.relationshipName
+        }
+        self.children = []
+        nodes = [self.selection.render()]
+        for n, child in enumerate(children):
+            relationship = relationships.get(child.relationship)
+            if not relationship:
+                raise ValueError(f"unknown child relationship: {child.relationship}")
+            child_sobject = related.get(relationship.childSObject)
+            if not child_sobject:
+                raise ValueError(
+                    f"metadata not provided for object: {relationship.childSObject}"
+                )
+            selection = _Selection(child_sobject, child.fields, related)
+            child_args = [f"first: {int(child.first)}"]
+            if child.where:
+                self.variables[f"where{n}"] = child.where
+                declarations.append(f"$where{n}: {child_sobject.name}_Filter")
+                child_args.append(f"where: $where{n}")
+            if child.order_by:
+                self.variables[f"orderBy{n}"] = child.order_by
+                declarations.append(f"$orderBy{n}: {child_sobject.name}_OrderBy")
+                child_args.append(f"orderBy: $orderBy{n}")
+            nodes.append(
+                f"{child.relationship}({', '.join(child_args)}) "
+                f"{{ edges {{ node {{ {selection.render()} }} }} }}"
+            )
+            self.children.append((child.relationship, selection))
+        self.sobject = sobject.name
+        self.query = (
+            f"query records({', '.join(declarations)}) {{ uiapi {{ query {{ "
+            f"{sobject.name}({', '.join(args)}) {{ "
+            f"edges {{ node {{ {' '.join(nodes)} }} }} "
+            f"pageInfo {{ hasNextPage endCursor }} }} }} }} }}"
+        )
+
+    def _decode(self, node: Mapping[str, Any]) -> dict[str, Any]:
+        record = self.selection.decode(node)
+        for relationship, selection in self.children:
+            edges = (node.get(relationship) or {}).get("edges") or ()
+            record[relationship] = [selection.decode(edge["node"]) for edge in edges]
+        return record
+
+    async def _records(self) -> AsyncIterator[dict[str, Any]]:
+        resource = graphql_resource(self.client)
+        cursor = None
+        while True:
+            data = await resource.query(self.query, {**self.variables, "after": cursor})
+            connection = data["uiapi"]["query"][self.sobject]
+            for edge in connection["edges"]:
+                yield self._decode(edge["node"])
+            page_info = connection["pageInfo"]
+            if not page_info["hasNextPage"]:
+                break
+            cursor = page_info["endCursor"]
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        return self._records()
@@ -1,10 +1,12 @@
 """Fondat Salesforce asynchronous jobs module."""
 
+import asyncio
 import csv
 import http
 import io
 
-from datetime import datetime
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
 from fondat.codec import JSONCodec
 from fondat.data import datacls
 from fondat.error import NotFoundError
@@ -49,6 +51,17 @@ class _QueriesResponse:
     nextRecordsUrl: str | None
 
 
+@datacls
+class _ResultPage:
+    resultLink: str
+
+
+@datacls
+class _ResultPagesResponse:
+    resultPages: list[_ResultPage]
+    nextRecordsUrl: str | None
+
+
 @datacls
 class _CreateQueryRequest:
     operation: Operation
@@ -58,6 +71,12 @@ class _CreateQueryRequest:
     lineEnding: LineEnding | None
 
 
+def parse_csv(data: bytes) -> list[list[str]]:
+    """Parse UTF-8 encoded CSV data into rows."""
+    with io.StringIO(data.decode("utf-8")) as sio:
+        return [row for row in csv.reader(sio)]
+
+
 def queries_resource(client: Client):
     """Create asynchronous jobs resource."""
 
@@ -68,6 +87,7 @@ def queries_resource(client: Client):
         """Asynchronous query job."""
 
         def __init__(self, id: str):
+            self.id = id
             self.path = f"{path}/{id}"
 
         @operation
@@ -89,14 +109,12 @@ def queries_resource(client: Client):
                 pass
 
         @query
-        async def results(
-            self, limit: int = 1000, cursor: bytes | None = None
-        ) -> Page[list[str]]:
+        async def data(self, limit: int = 1000, cursor: bytes | None = None) -> Page[bytes]:
             """
-            Get results for a query job as CSV rows.
+            Get results for a query job as raw CSV data.
 
-            The returned page items contain CSV-decoded rows. The first row is the CSV header,
-            which contains the names of the columns.
+            The returned page contains a single item: the unparsed CSV data, including the
+            CSV header row.
             """
 
             params = {"maxRecords": str(limit)}
@@ -110,10 +128,39 @@ def queries_resource(client: Client):
             ) as response:
                 if response.status == http.HTTPStatus.NO_CONTENT.value:
                     raise NotFoundError  # no results yet
-                with io.StringIO(await response.text("utf-8")) as sio:
-                    items = [row for row in csv.reader(sio)]
+                data = await response.read()
                 locator = response.headers.get("Sforce-Locator")
-            return Page(items=items, cursor=locator.encode() if locator != "null" else None)
+            return Page(items=[data], cursor=locator.encode() if locator != "null" else None)
+
+        @query
+        async def results(
+            self, limit: int = 1000, cursor: bytes | None = None
+        ) -> Page[list[str]]:
+            """
+            Get results for a query job as CSV rows.
+
+            The returned page items contain CSV-decoded rows. The first row is the CSV header,
+            which contains the names of the columns.
+            """
+
+            page = await self.data(limit=limit, cursor=cursor)
+            return Page(items=parse_csv(page.items[0]), cursor=page.cursor)
+
+        @query
+        async def result_pages(self, cursor: bytes | None = None) -> Page[str]:
+            """
+            Get links to the result pages of a completed query job, which can be retrieved
+            concurrently. Requires API version 62.0 or later.
+            """
+
+            async with client.request(
+                method="GET", path=cursor.decode() if cursor else f"{self.path}/resultPages"
+            ) as response:
+                json = JSONCodec.get(_ResultPagesResponse).decode(await response.json())
+            return Page(
+                items=[page.resultLink for page in json.resultPages],
+                cursor=json.nextRecordsUrl.encode() if json.nextRecordsUrl else None,
+            )
 
     @resource
     class QueriesResource:
@@ -149,3 +196,82 @@ def queries_resource(client: Client):
             return QueryResource(id)
 
     return QueriesResource()
+
+
+_reaping = set()  # strong references to background reaping tasks
+
+
+class JobReaper:
+    """
+    Aborts and deletes query jobs in the background.
+
+    Parameters:
+    • client: client object through which to perform requests
+    """
+
+    def __init__(self, client: Client):
+        self.client = client
+        self.queries = queries_resource(client)
+        self.tasks = set()
+
+    async def _reap(self, id: str, abort: bool):
+        query = self.queries[id]
+        if abort:
+            with suppress(Exception):  # job may have already completed
+                await query.abort()
+        with suppress(Exception):
+            await query.delete()
+
+    def reap(self, id: str, abort: bool = False) -> None:
+        """Schedule a query job to be optionally aborted, then deleted, in the background."""
+        task = asyncio.create_task(self._reap(id, abort))
+        for tasks in (self.tasks, _reaping):
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def reap_orphans(
+        self,
+        *,
+        older_than: timedelta,
+        created_by: str | None = None,
+        abort_running: bool = False,
+    ) -> int:
+        """
+        Delete orphaned query jobs, such as those left by crashed processes. Returns the
+        number of jobs reaped.
+
+        Parameters:
+        • older_than: minimum age of job to be considered orphaned
+        • created_by: identifier of user that created jobs  [authenticated user]
+        • abort_running: also abort and delete jobs that are still running
+
+        Age alone does not identify an orphaned job: jobs of live processes sharing the same
+        user, including completed jobs whose results are still being retrieved, are reaped
+        if they are older than the specified age. Choose an age longer than any live process
+        can use a job. Running jobs are only reaped if explicitly requested.
+        """
+        if created_by is None:
+            created_by = self.client.token.id.rsplit("/", 1)[-1]
+        cutoff = datetime.now(timezone.utc) - older_than
+        running = {"UploadComplete", "InProgress"}
+        orphans = []
+        cursor = None
+        while True:
+            page = await self.queries.get(cursor=cursor)
+            orphans.extend(
+                job
+                for job in page.items
+                if job.createdById == created_by
+                and job.createdDate < cutoff
+                and (abort_running or job.state not in running)
+            )
+            if not (cursor := page.cursor):
+                break
+        await asyncio.gather(
+            *(self._reap(job.id, abort=job.state in running) for job in orphans)
+        )
+        return len(orphans)
+
+    async def wait(self) -> None:
+        """Wait for background reaping of jobs to complete."""
+        await asyncio.gather(*self.tasks)
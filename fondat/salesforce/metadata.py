@@ -0,0 +1,214 @@
+"""Fondat Salesforce compact metadata module."""
+
+import asyncio
+import fondat.error
+
+from collections.abc import Iterable, Iterator, Mapping
+from fondat.codec import JSONCodec
+from fondat.salesforce.client import Client
+from fondat.salesforce.composite import BATCH_LIMIT, BatchRequest, composite_resource
+from fondat.salesforce.sobjects import SObject, sobjects_metadata_resource
+from sys import intern
+from typing import Any
+
+
+def _intern(value: str | None) -> str | None:
+    return intern(value) if value is not None else None
+
+
+def _flags(names: tuple[str, ...], json: Mapping[str, Any]) -> int:
+    return sum(1 << n for n, name in enumerate(names) if json.get(name))
+
+
+def _flag_properties(cls):
+    """Add read-only boolean properties for each flag name of a compact metadata class."""
+
+    def flag(bit):
+        return property(lambda self: bool(self._flags & bit))
+
+    for n, name in enumerate(cls._flag_names):
+        setattr(cls, name, flag(1 << n))
+    return cls
+
+
+@_flag_properties
+class FieldInfo:
+    """
+    Compact Salesforce object field metadata.
+
+    Attribute names match those of the sobjects.Field data class, allowing a FieldInfo object
+    to be used in its place (e.g. with sobject_field_type). Boolean attributes are packed into
+    a single integer; string values are interned.
+    """
+
+    _flag_names = (
+        "aggregatable",
+        "calculated",
+        "createable",
+        "custom",
+        "externalId",
+        "filterable",
+        "groupable",
+        "idLookup",
+        "nameField",
+        "nillable",
+        "sortable",
+        "unique",
+        "updateable",
+    )
+
+    __slots__ = (
+        "name",
+        "label",
+        "type",
+        "length",
+        "precision",
+        "scale",
+        "referenceTo",
+        "relationshipName",
+        "picklistValues",
+        "compoundFieldName",
+        "_flags",
+    )
+
+    def __init__(self, json: Mapping[str, Any]):
+        self.name = intern(json["name"])
+        self.label = json.get("label")
+        self.type = intern(json["type"])
+        self.length = json.get("length", 0)
+        self.precision = json.get("precision", 0)
+        self.scale = json.get("scale", 0)
+        self.referenceTo = tuple(intern(r) for r in json.get("referenceTo") or ())
+        self.relationshipName = _intern(json.get("relationshipName"))
+        self.picklistValues = tuple(
+            intern(p["value"]) for p in json.get("picklistValues") or () if p.get("active")
+        )
+        self.compoundFieldName = _intern(json.get("compoundFieldName"))
+        self._flags = _flags(self._flag_names, json)
+
+    def __repr__(self):
+        return f"FieldInfo(name={self.name!r}, type={self.type!r})"
+
+
+@_flag_properties
+class SObjectInfo:
+    """
+    Compact Salesforce object metadata.
+
+    Attribute names match those of the sobjects.SObject data class, allowing an SObjectInfo
+    object to be used in its place (e.g. with bulk.SObjectQuery).
+    """
+
+    _flag_names = (
+        "createable",
+        "custom",
+        "deletable",
+        "queryable",
+        "replicateable",
+        "retrieveable",
+        "searchable",
+        "updateable",
+    )
+
+    __slots__ = ("name", "label", "keyPrefix", "_fields", "_flags")
+
+    def __init__(self, json: Mapping[str, Any]):
+        self.name = intern(json["name"])
+        self.label = json.get("label")
+        self.keyPrefix = _intern(json.get("keyPrefix"))
+        self._fields = {f.name: f for f in (FieldInfo(f) for f in json["fields"])}
+        self._flags = _flags(self._flag_names, json)
+
+    @property
+    def fields(self) -> Iterable[FieldInfo]:
+        """Object fields, in describe order."""
+        return self._fields.values()
+
+    def field(self, name: str) -> FieldInfo:
+        """Return the named field metadata; raises KeyError if not found."""
+        return self._fields[name]
+
+    def __repr__(self):
+        return f"SObjectInfo(name={self.name!r})"
+
+
+class MetadataStore(Mapping[str, SObjectInfo]):
+    """
+    Compact store of Salesforce object metadata, keyed by object name.
+
+    Object metadata can be added from describe JSON, or from SObject data class instances.
+    """
+
+    __slots__ = ("_sobjects",)
+
+    def __init__(self):
+        self._sobjects: dict[str, SObjectInfo] = {}
+
+    def add(self, describe: SObject | Mapping[str, Any]) -> SObjectInfo:
+        """Add object metadata to the store, replacing any existing entry."""
+        if isinstance(describe, SObject):
+            describe = JSONCodec.get(SObject).encode(describe)
+        info = SObjectInfo(describe)
+        self._sobjects[info.name] = info
+        return info
+
+    def field(self, sobject: str, field: str) -> FieldInfo:
+        """Return the metadata of the named field of the named object."""
+        return self._sobjects[sobject].field(field)
+
+    def __getitem__(self, name: str) -> SObjectInfo:
+        return self._sobjects[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sobjects)
+
+    def __len__(self) -> int:
+        return len(self._sobjects)
+
+
+async def describe_sobjects(
+    client: Client,
+    names: Iterable[str] | None = None,
+    *,
+    store: MetadataStore | None = None,
+    concurrency: int = 4,
+) -> MetadataStore:
+    """
+    Describe Salesforce objects in bulk, through composite batch requests.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • names: names of objects to describe  [all objects in the org]
+    • store: metadata store to add object metadata to  [new store]
+    • concurrency: maximum number of batch requests to perform concurrently
+
+    Each batch request describes up to 25 objects. Object metadata is added to the store as
+    each batch request completes. If an object cannot be described, then an exception is
+    raised.
+    """
+
+    if names is None:
+        sobjects = await sobjects_metadata_resource(client).get()
+        names = [sobject.name for sobject in sobjects.sobjects]
+    names = list(names)
+    if store is None:
+        store = MetadataStore()
+    composite = composite_resource(client)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def describe(chunk: list[str]):
+        requests = [
+            BatchRequest(method="GET", url=f"v{client.version}/sobjects/{name}/describe")
+            for name in chunk
+        ]
+        async with semaphore:
+            results = await composite.batch(requests)
+        for name, result in zip(chunk, results):
+            if not 200 <= result.statusCode <= 299:
+                raise fondat.error.errors[result.statusCode](f"{name}: {result.result}")
+            store.add(result.result)
+
+    await asyncio.gather(
+        *(describe(names[n : n + BATCH_LIMIT]) for n in range(0, len(names), BATCH_LIMIT))
+    )
+    return store
@@ -0,0 +1,225 @@
+"""Fondat Salesforce multi-org client pool module."""
+
+import aiohttp
+import asyncio
+
+from collections import deque
+from collections.abc import Callable, Coroutine
+from contextlib import asynccontextmanager
+from fondat.salesforce.client import Client
+from time import monotonic
+from typing import Any
+
+
+class _Tenant:
+    """Scheduling state of a tenant: token bucket, virtual finish time and waiters."""
+
+    __slots__ = ("weight", "rate", "burst", "tokens", "updated", "finish", "waiters")
+
+    def __init__(self, weight: float, rate: float | None, burst: float | None):
+        self.weight = weight
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 1, 1)
+        self.tokens = self.burst
+        self.updated = monotonic()
+        self.finish = 0.0
+        self.waiters = deque()
+
+    def refill(self, now: float):
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self) -> float:
+        """Return seconds until the tenant's bucket has a token."""
+        return 0 if self.rate is None or self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class _Scheduler:
+    """
+    Grants request slots to tenants through weighted fair queuing, limiting each tenant's
+    request rate with a token bucket.
+    """
+
+    def __init__(self, concurrency: int):
+        self.available = concurrency
+        self.tenants = {}
+        self.virtual = 0.0  # virtual time of the last granted request
+        self.timer = None
+
+    def _dispatch(self):
+        now = monotonic()
+        while self.available > 0:
+            eligible = []
+            delays = []
+            for tenant in self.tenants.values():
+                while tenant.waiters and tenant.waiters[0].done():  # cancelled
+                    tenant.waiters.popleft()
+                if not tenant.waiters:
+                    continue
+                tenant.refill(now)
+                if (delay := tenant.delay()) > 0:
+                    delays.append(delay)
+                else:
+                    eligible.append(tenant)
+            if not eligible:
+                if delays and self.timer is None:
+                    self.timer = asyncio.get_running_loop().call_later(min(delays), self._wake)
+                return
+            tenant = min(eligible, key=lambda t: max(t.finish, self.virtual))
+            self.virtual = max(tenant.finish, self.virtual)
+            tenant.finish = self.virtual + 1 / tenant.weight
+            if tenant.rate is not None:
+                tenant.tokens -= 1
+            self.available -= 1
+            tenant.waiters.popleft().set_result(None)
+
+    def _wake(self):
+        self.timer = None
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, name: str):
+        """Acquire a request slot for the named tenant for the duration of the context."""
+        tenant = self.tenants[name]
+        granted = asyncio.get_running_loop().create_future()
+        tenant.waiters.append(granted)
+        self._dispatch()
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if granted.done() and not granted.cancelled():  # granted, then cancelled
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        self.available += 1
+        self._dispatch()
+
+
+class _PooledClient(Client):
+    """Client whose requests are scheduled by a client pool."""
+
+    scheduler = None
+    tenant = None
+
+    @asynccontextmanager
+    async def request(self, method, path, **kwargs) -> Any:
+        if self.scheduler is None:  # resource discovery, scheduled by pool
+            async with super().request(method, path, **kwargs) as response:
+                yield response
+            return
+        async with self.scheduler.slot(self.tenant):
+            async with super().request(method, path, **kwargs) as response:
+                yield response
+
+
+class ClientPool:
+    """
+    Pool of Salesforce API clients for multiple orgs (tenants), sharing a single connection
+    pool, with fair scheduling of requests between tenants.
+
+    Parameters:
+    • version: API version to use; example: "54.0"
+    • concurrency: maximum number of concurrent requests across all tenants
+    • connector: connector to share between clients  [new connector]
+    • retries: number of times to retry server errors
+
+    Each tenant's client is created once, and cached along with its resources. Requests are
+    granted slots by weighted fair queuing: when tenants compete for slots, each receives a
+    share of slots proportional to its weight, regardless of how many requests it has queued.
+    A tenant can also be limited to a sustained request rate, with bursts, by a token bucket.
+    A slot is held until the response is released.
+
+    Clients are obtained within the pool's async context, and remain valid until the
+    context is exited.
+    """
+
+    def __init__(
+        self,
+        *,
+        version: str,
+        concurrency: int = 64,
+        connector: aiohttp.BaseConnector | None = None,
+        retries: int = 3,
+    ):
+        self.version = version
+        self.concurrency = concurrency
+        self.connector = connector
+        self.retries = retries
+        self.session = None
+        self.scheduler = _Scheduler(concurrency)
+        self.clients = {}
+
+    async def client(
+        self,
+        tenant: str,
+        authenticate: Callable[[], Coroutine[Any, Any, Any]],
+        *,
+        weight: float = 1.0,
+        rate: float | None = None,
+        burst: float | None = None,
+    ) -> Client:
+        """
+        Return the client of a tenant, creating it if not already in the pool.
+
+        Parameters:
+        • tenant: tenant key, such as org id or instance URL
+        • authenticate: coroutine function to authenticate and return an access token
+        • weight: relative share of request slots when tenants compete
+        • rate: maximum sustained requests per second  [unlimited]
+        • burst: maximum requests in a burst above the sustained rate  [rate]
+
+        Scheduling parameters only apply when the tenant's client is created.
+        """
+        if self.session is None:
+            raise RuntimeError("must obtain clients within async context")
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        if tenant not in self.clients:
+            self.scheduler.tenants[tenant] = _Tenant(weight, rate, burst)
+            self.clients[tenant] = asyncio.create_task(self._create(tenant, authenticate))
+        try:
+            return await asyncio.shield(self.clients[tenant])
+        except Exception:
+            if self.clients.get(tenant) and self.clients[tenant].done():
+                del self.clients[tenant]  # allow creation to be retried
+            raise
+
+    async def _create(self, tenant: str, authenticate) -> Client:
+        async with self.scheduler.slot(tenant):
+            client = await _PooledClient.create(
+                session=self.session,
+                version=self.version,
+                authenticate=authenticate,
+                retries=self.retries,
+            )
+        client.scheduler = self.scheduler
+        client.tenant = tenant
+        return client
+
+    async def __aenter__(self):
+        if self.session is not None:
+            raise RuntimeError("context is not reentrant")
+        connector = self.connector or aiohttp.TCPConnector(
+            limit=self.concurrency, ttl_dns_cache=300, keepalive_timeout=60
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            connector_owner=self.connector is None,
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+        return self
+
+    async def __aexit__(self, *args):
+        for task in self.clients.values():
+            task.cancel()
+        await asyncio.gather(*self.clients.values(), return_exceptions=True)
+        self.clients.clear()
+        self.scheduler.tenants.clear()
+        await self.session.close()
+        self.session = None
@@ -0,0 +1,352 @@
+"""Fondat Salesforce query module."""
+
+import asyncio
+import re
+
+from collections import namedtuple
+from collections.abc import AsyncIterator, Iterable, Mapping
+from datetime import date, datetime
+from fondat.codec import JSONCodec
+from fondat.data import datacls
+from fondat.pagination import Page
+from fondat.resource import query, resource
+from fondat.salesforce.bulk import SObjectQuery
+from fondat.salesforce.client import Client
+from fondat.salesforce.sobjects import SObject, sobject_field_type
+from typing import Any, Literal, TypedDict
+from urllib.parse import quote
+
+
+@datacls
+class _QueryResponse:
+    done: bool
+    totalSize: int
+    records: list[dict[str, Any]]
+    nextRecordsUrl: str | None
+
+
+def query_resource(client: Client):
+    """Return resource representing SOQL queries through the REST API."""
+
+    path = client.resources["query"]
+
+    @resource
+    class QueryResource:
+        """..."""
+
+        @query
+        async def get(self, q: str, cursor: bytes | None = None) -> Page[dict[str, Any]]:
+            """
+            Execute a SOQL query. The returned page items contain records as JSON objects;
+            the cursor is used to retrieve subsequent pages of records.
+            """
+            async with client.request(
+                method="GET",
+                path=cursor.decode() if cursor else f"{path}/",
+                params=None if cursor else {"q": q},
+            ) as response:
+                json = JSONCodec.get(_QueryResponse).decode(await response.json())
+            return Page(
+                items=json.records,
+                cursor=json.nextRecordsUrl.encode() if json.nextRecordsUrl else None,
+            )
+
+    return QueryResource()
+
+
+Function = Literal["AVG", "COUNT", "COUNT_DISTINCT", "MAX", "MIN", "SUM"]
+
+_alias = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+
+class AggregateQuery:
+    """
+    Performs an aggregate query, computing aggregates server-side.
+
+    Parameters:
+    • client: client object through which to perform query
+    • sobject: Salesforce object metadata
+    • group_by: fields to group results by
+    • aggregates: mapping of result names to aggregates to compute
+    • where: query condition expression
+    • having: condition expression on grouped results
+    • order_by: order of query results
+    • limit: maximum number of rows in query results
+
+    Group fields must be groupable, and aggregated fields must be aggregatable, as indicated
+    in field metadata. Each row is a dictionary containing group field and aggregate values.
+    Group field values, and MIN and MAX aggregate values are typed by their source field;
+    COUNT and COUNT_DISTINCT values are integers; AVG values are floating point numbers; SUM
+    values are floating point numbers, or integers for integer fields.
+
+    Bulk queries do not support aggregate functions; aggregate queries are performed through
+    the REST API.
+    """
+
+    Aggregate = namedtuple("Aggregate", "function, field")
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: SObject,
+        *,
+        group_by: Iterable[str] = (),
+        aggregates: Mapping[str, Aggregate | tuple[Function, str]],
+        where: str | None = None,
+        having: str | None = None,
+        order_by: str | None = None,
+        limit: int | None = None,
+    ):
+        self.client = client
+        group_by = list(group_by)
+        if not aggregates:
+            raise ValueError("must compute at least one aggregate")
+        fields = {field.name: field for field in sobject.fields}
+        types = {}
+        for name in group_by:
+            field = fields.get(name)
+            if not field:
+                raise ValueError(f"unknown field: {name}")
+            if not field.groupable:
+                raise ValueError(f"field is not groupable: {name}")
+            types[name] = sobject_field_type(field)
+        select = list(group_by)
+        for alias, (function, name) in aggregates.items():
+            if not _alias.match(alias) or alias in types:
+                raise ValueError(f"invalid aggregate name: {alias}")
+            field = fields.get(name)
+            if not field:
+                raise ValueError(f"unknown field: {name}")
+            if not field.aggregatable:
+                raise ValueError(f"field is not aggregatable: {name}")
+            match function:
+                case "COUNT" | "COUNT_DISTINCT":
+                    types[alias] = int | None
+                case "AVG":
+                    types[alias] = float | None
+                case "SUM":
+                    types[alias] = (int if field.type in {"int", "long"} else float) | None
+                case "MIN" | "MAX":
+                    types[alias] = sobject_field_type(field)
+                case _:
+                    raise ValueError(f"unsupported aggregate function: {function}")
+            select.append(f"{function}({name}) {alias}")
+        self.td = TypedDict("AggregateDict", types)
+        self.stmt = f"SELECT {', '.join(select)} FROM {sobject.name}"
+        if where:
+            self.stmt += f" WHERE {where}"
+        if group_by:
+            self.stmt += f" GROUP BY {', '.join(group_by)}"
+        if having:
+            self.stmt += f" HAVING {having}"
+        if order_by:
+            self.stmt += f" ORDER BY {order_by}"
+        if limit:
+            self.stmt += f" LIMIT {limit}"
+
+    async def _rows(self) -> AsyncIterator[dict[str, Any]]:
+        resource = query_resource(self.client)
+        codec = JSONCodec.get(self.td)
+        cursor = None
+        while True:
+            page = await resource.get(q=self.stmt, cursor=cursor)
+            for record in page.items:
+                yield codec.decode(record)
+            if not (cursor := page.cursor):
+                break
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        return self._rows()
+
+
+_escapes = str.maketrans(
+    {
+        "\\": "\\\\",
+        "'": "\\'",
+        '"': '\\"',
+        "\n": "\\n",
+        "\r": "\\r",
+        "\t": "\\t",
+        "\b": "\\b",
+        "\f": "\\f",
+    }
+)
+
+
+def soql_literal(value: Any) -> str:
+    """Return a value as a SOQL literal, quoting and escaping strings."""
+    match value:
+        case None:
+            return "null"
+        case bool():
+            return "true" if value else "false"
+        case int() | float():
+            return str(value)
+        case datetime():
+            value = value.replace(microsecond=0)
+            return value.isoformat() if value.tzinfo else f"{value.isoformat()}Z"
+        case date():
+            return value.isoformat()
+        case str():
+            return f"'{value.translate(_escapes)}'"
+    raise TypeError(f"unsupported literal type: {type(value)}")
+
+
+def _flatten(record: Mapping[str, Any], prefix: str = "") -> dict[str, Any]:
+    """Flatten nested parent records of a REST query result into relationship paths."""
+    result = {}
+    for key, value in record.items():
+        if key == "attributes":
+            continue
+        if isinstance(value, Mapping):
+            result.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            result[f"{prefix}{key}"] = value
+    return result
+
+
+class InQuery:
+    """
+    Queries records with a field value in a large collection of values, splitting the
+    collection into as few concurrent queries as fit within SOQL statement length limits.
+
+    Parameters:
+    • client: client object through which to perform queries
+    • sobject: Salesforce object metadata
+    • field: name of field to match values against
+    • values: values to match
+    • columns: columns to select  [all fields]
+    • where: additional query condition expression
+    • related: metadata of related objects, keyed by object name
+    • bulk: perform bulk queries, or REST queries  [bulk if more than bulk_threshold values]
+    • bulk_threshold: number of values above which bulk queries are performed
+    • concurrency: maximum number of queries to perform concurrently
+    • max_length: maximum length of a bulk query statement
+    • max_url_length: maximum length of an encoded REST query statement
+
+    Values are converted to SOQL literals, with strings quoted and escaped. Duplicate values
+    are removed, so each matching record is returned by exactly one query; rows are returned
+    as queries yield them, in no particular order. Columns are typed as in SObjectQuery.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: SObject,
+        field: str,
+        values: Iterable[Any],
+        *,
+        columns: Iterable[str] | None = None,
+        where: str | None = None,
+        related: Mapping[str, SObject] | None = None,
+        bulk: bool | None = None,
+        bulk_threshold: int = 2000,
+        concurrency: int = 4,
+        max_length: int = 100000,
+        max_url_length: int = 16000,
+    ):
+        fields = {f.name: f for f in sobject.fields}
+        if field not in fields:
+            raise ValueError(f"unknown field: {field}")
+        if not fields[field].filterable:
+            raise ValueError(f"field is not filterable: {field}")
+        self.client = client
+        self.sobject = sobject
+        self.columns = None if columns is None else list(columns)
+        self.related = related
+        self.concurrency = concurrency
+        self.literals = list(dict.fromkeys(soql_literal(value) for value in values))
+        self.bulk = len(self.literals) > bulk_threshold if bulk is None else bulk
+        self.condition = f"({where}) AND {field} IN " if where else f"{field} IN "
+        base = self._query("()")
+        self.td = base.td
+        if self.bulk:
+            self.chunks = self._pack(len(base.stmt), max_length, len)
+        else:
+            length = len(quote(base.stmt))
+            self.chunks = self._pack(length, max_url_length, lambda s: len(quote(s)))
+
+    def _query(self, values: str) -> SObjectQuery:
+        return SObjectQuery(
+            self.client,
+            self.sobject,
+            columns=self.columns,
+            where=self.condition + values,
+            related=self.related,
+        )
+
+    def _pack(self, base: int, limit: int, size) -> list[list[str]]:
+        """Pack literals into chunks, each within the statement length limit."""
+        chunks = []
+        chunk, length = [], base
+        separator = size(",")
+        for literal in self.literals:
+            n = size(literal) + separator
+            if chunk and length + n > limit:
+                chunks.append(chunk)
+                chunk, length = [], base
+            chunk.append(literal)
+            length += n
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    async def _bulk(self, chunk: list[str]) -> AsyncIterator[dict[str, Any]]:
+        async with self._query(f"({','.join(chunk)})") as query:
+            async for row in query:
+                yield row
+
+    async def _rest(self, chunk: list[str]) -> AsyncIterator[dict[str, Any]]:
+        resource = query_resource(self.client)
+        codec = JSONCodec.get(self.td)
+        columns = dict.fromkeys(self.td.__annotations__)  # null parent omits its paths
+        stmt = self._query(f"({','.join(chunk)})").stmt
+        cursor = None
+        while True:
+            page = await resource.get(q=stmt, cursor=cursor)
+            for record in page.items:
+                yield codec.decode({**columns, **_flatten(record)})
+            if not (cursor := page.cursor):
+                break
+
+    async def _rows(self) -> AsyncIterator[dict[str, Any]]:
+        rows = asyncio.Queue(1000)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        query = self._bulk if self.bulk else self._rest
+
+        async def run(chunk: list[str]):
+            async with semaphore:
+                async for row in query(chunk):
+                    await rows.put(row)
+
+        tasks = [asyncio.create_task(run(chunk)) for chunk in self.chunks]
+        pending = set(tasks)
+        ids = set()
+        try:
+            while pending or not rows.empty():
+                if rows.empty():
+                    get = asyncio.create_task(rows.get())
+                    done, _ = await asyncio.wait(
+                        pending | {get}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done - {get}:
+                        pending.remove(task)
+                        task.result()  # raise query exception
+                    if get not in done:
+                        get.cancel()
+                        continue
+                    row = get.result()
+                else:
+                    row = rows.get_nowait()
+                if (id := row.get("Id")) is not None:
+                    if id in ids:
+                        continue
+                    ids.add(id)
+                yield row
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        return self._rows()
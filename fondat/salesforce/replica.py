@@ -0,0 +1,255 @@
+"""Fondat Salesforce local replica module."""
+
+import asyncio
+import dataclasses
+import logging
+import sqlite3
+
+from fondat.csv import TypedDictCodec
+from fondat.salesforce.bulk import EXCLUDED_TYPES, SObjectQuery
+from fondat.salesforce.client import Client
+from fondat.salesforce.jobs import parse_csv
+from fondat.salesforce.sobjects import Address, Location, SObject, sobject_field_type
+from time import time
+from typing import Any, TypedDict
+
+
+_logger = logging.getLogger(__name__)
+
+
+_exclude_types = EXCLUDED_TYPES | {"base64"}  # binary content is not replicated
+
+_compound_types = {"address": Address, "location": Location}
+
+_component_suffixes = (  # component field name suffix, and compound value attribute
+    ("GeocodeAccuracy", "accuracy"),
+    ("CountryCode", "countryCode"),
+    ("StateCode", "stateCode"),
+    ("PostalCode", "postalCode"),
+    ("Latitude", "latitude"),
+    ("Longitude", "longitude"),
+    ("Country", "country"),
+    ("Street", "street"),
+    ("State", "state"),
+    ("City", "city"),
+)
+
+
+def _component_attribute(name: str) -> str | None:
+    """Return the compound value attribute of a component field, or None if unknown."""
+    name = name.removesuffix("__s")
+    for suffix, attribute in _component_suffixes:
+        if name.endswith(suffix):
+            return attribute
+
+
+class Replica:
+    """
+    Local SQLite replica of the records of a Salesforce object.
+
+    Parameters:
+    • client: client object through which to perform queries
+    • sobject: Salesforce object metadata
+    • path: path to SQLite database file
+    • staleness: maximum seconds since last refresh for replica to be considered fresh
+    • interval: seconds between periodic refreshes within the async context  [no refresh]
+
+    The replica table has a column for each field of the object that can be bulk queried.
+    The first refresh extracts all records through a bulk query; subsequent refreshes query
+    records with a SystemModstamp at or after the latest previously seen, including deleted
+    records, which are removed from the replica. Objects without both SystemModstamp and
+    IsDeleted fields are fully extracted on each refresh, so that deleted records are always
+    removed. The refresh state is stored in the database, allowing the replica to be reused
+    across processes.
+
+    Values of compound address and location fields are rebuilt from their component fields,
+    as identified by the compoundFieldName of component field metadata. The names attribute
+    contains the names of all fields whose values the replica provides; binary (base64)
+    fields are not provided.
+
+    Lookups are performed synchronously on a separate connection from refreshes, which are
+    written in a worker thread.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: SObject,
+        path: str,
+        *,
+        staleness: float = 300,
+        interval: float | None = None,
+    ):
+        self.client = client
+        self.sobject = sobject
+        self.path = path
+        self.staleness = staleness
+        self.interval = interval
+        self.table = sobject.name
+        self.fields = [f for f in sobject.fields if f.type not in _exclude_types]
+        self.columns = [f.name for f in self.fields]
+        if "Id" not in self.columns:
+            raise ValueError(f"object has no Id field: {sobject.name}")
+        self.codec = TypedDictCodec(
+            TypedDict("ReplicaDict", {f.name: sobject_field_type(f) for f in self.fields}),
+            self.columns,
+        )
+        self.compound = {}  # compound field name: (value type, {attribute: component})
+        for field in sobject.fields:
+            if field.type in _compound_types:
+                components = {
+                    _component_attribute(f.name): f.name
+                    for f in self.fields
+                    if getattr(f, "compoundFieldName", None) == field.name
+                }
+                components.pop(None, None)
+                if components:
+                    self.compound[field.name] = (_compound_types[field.type], components)
+        self.names = frozenset((*self.columns, *self.compound))
+        self.refreshed = None  # time of last refresh
+        self.modstamp = None  # latest SystemModstamp seen
+        self.lock = asyncio.Lock()
+        self.task = None
+        self._names = ", ".join(f'"{c}"' for c in self.columns)
+        self._writer = self._connect()
+        with self._writer:
+            self._writer.execute("PRAGMA journal_mode=WAL")
+            self._writer.execute(
+                "CREATE TABLE IF NOT EXISTS _replica "
+                "(name TEXT PRIMARY KEY, modstamp TEXT, refreshed REAL)"
+            )
+            existing = [
+                row[1] for row in self._writer.execute(f'PRAGMA table_info("{self.table}")')
+            ]
+            if existing != self.columns:  # schema changed; reload
+                self._writer.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+                self._writer.execute("DELETE FROM _replica WHERE name = ?", (self.table,))
+                self._create(self.table)
+        self._reader = self._connect()
+        if row := self._reader.execute(
+            "SELECT modstamp, refreshed FROM _replica WHERE name = ?", (self.table,)
+        ).fetchone():
+            self.modstamp, self.refreshed = row
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def _create(self, table: str):
+        columns = ", ".join(
+            f'"{c}" TEXT' + (" PRIMARY KEY" if c == "Id" else "") for c in self.columns
+        )
+        self._writer.execute(f'CREATE TABLE "{table}" ({columns})')
+
+    @property
+    def fresh(self) -> bool:
+        """Return if the replica was refreshed within the staleness bound."""
+        return self.refreshed is not None and time() - self.refreshed <= self.staleness
+
+    def get(self, id: str) -> dict[str, Any] | None:
+        """Return the typed values of the record with the specified Id, or None if not found."""
+        row = self._reader.execute(
+            f'SELECT {self._names} FROM "{self.table}" WHERE "Id" = ?', (id,)
+        ).fetchone()
+        if row is None:
+            return None
+        values = self.codec.decode(row)
+        for name, (python_type, components) in self.compound.items():
+            value = {a: values[c] for a, c in components.items() if values[c] is not None}
+            if value:
+                value = python_type(
+                    **{f.name: value.get(f.name) for f in dataclasses.fields(python_type)}
+                )
+            values[name] = value or None
+        return values
+
+    def _write(self, table: str, rows: list[list[str]], deleted: list[str]):
+        """Write a page of rows to a table; performed in a worker thread."""
+        placeholders = ", ".join("?" * len(self.columns))
+        with self._writer:
+            self._writer.executemany(
+                f'INSERT OR REPLACE INTO "{table}" ({self._names}) VALUES ({placeholders})',
+                rows,
+            )
+            self._writer.executemany(
+                f'DELETE FROM "{table}" WHERE "Id" = ?', ((id,) for id in deleted)
+            )
+
+    def _stage(self, staging: str):
+        with self._writer:
+            self._writer.execute(f'DROP TABLE IF EXISTS "{staging}"')
+            self._create(staging)
+
+    def _commit(self, staging: str | None, modstamp: str | None, refreshed: float):
+        """Commit refresh state, replacing table with staging table if provided."""
+        with self._writer:
+            if staging:
+                self._writer.execute(f'DELETE FROM "{self.table}"')
+                self._writer.execute(f'INSERT INTO "{self.table}" SELECT * FROM "{staging}"')
+                self._writer.execute(f'DROP TABLE "{staging}"')
+            self._writer.execute(
+                "INSERT OR REPLACE INTO _replica VALUES (?, ?, ?)",
+                (self.table, modstamp, refreshed),
+            )
+
+    async def refresh(self) -> None:
+        """Refresh the replica with records modified since the last refresh."""
+        async with self.lock:
+            start = time()
+            delta = (
+                "SystemModstamp" in self.columns
+                and "IsDeleted" in self.columns
+                and self.modstamp is not None
+            )
+            staging = None if delta else f"{self.table}__staging"
+            if staging:
+                await asyncio.to_thread(self._stage, staging)
+            query = SObjectQuery(
+                self.client,
+                self.sobject,
+                columns=self.columns,
+                where=f"SystemModstamp >= {self.modstamp}" if delta else None,
+                operation="queryAll" if delta else "query",
+            )
+            modstamp = self.modstamp
+            async with query:
+                async for data in query.pages():
+                    rows = parse_csv(data)
+                    index = {c: n for n, c in enumerate(rows[0])}
+                    order = [index[c] for c in self.columns]
+                    deleted = index.get("IsDeleted")
+                    live, dead = [], []
+                    for row in rows[1:]:
+                        if deleted is not None and row[deleted] == "true":
+                            dead.append(row[index["Id"]])
+                        else:
+                            live.append([row[n] for n in order])
+                    if (n := index.get("SystemModstamp")) is not None and len(rows) > 1:
+                        modstamp = max(modstamp or "", *(row[n] for row in rows[1:]))
+                    await asyncio.to_thread(self._write, staging or self.table, live, dead)
+            await asyncio.to_thread(self._commit, staging, modstamp, start)
+            self.modstamp = modstamp
+            self.refreshed = start
+
+    async def _periodic(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                _logger.exception("replica refresh failed: %s", self.table)
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self):
+        if self.interval is not None:
+            self.task = asyncio.create_task(self._periodic())
+        return self
+
+    async def __aexit__(self, *args):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def close(self) -> None:
+        """Close the replica database connections."""
+        self._reader.close()
+        self._writer.close()
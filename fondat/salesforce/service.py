@@ -1,6 +1,5 @@
 """Fondat Salesforce service module."""
 
-from fondat.codec import JSONCodec
 from fondat.data import datacls
 from fondat.error import NotFoundError
 from fondat.resource import query, resource
@@ -36,17 +35,13 @@ def service_resource(client: Client):
 
             for version in await self.versions():
                 if version.version == client.version:
-                    async with client.request(
-                        method="GET", path=f"/{version.url}/"
-                    ) as response:
-                        return await response.json()
+                    return await client.get(f"/{version.url}/")
             raise NotFoundError(f"unknown version: {client.version}")
 
         @query
         async def versions(self) -> list[Version]:
             """List available REST API versions."""
 
-            async with client.request(method="GET", path="/services/data/") as response:
-                return JSONCodec.get(list[Version]).decode(await response.json())
+            return await client.get("/services/data/", python_type=list[Version])
 
     return ServiceResource()
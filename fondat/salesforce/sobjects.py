@@ -77,6 +77,7 @@ class Field:
     calculated: bool
     cascadeDelete: bool
     caseSensitive: bool
+    compoundFieldName: str | None
     createable: bool
     custom: bool
     defaultedOnCreate: bool
@@ -103,6 +104,8 @@ class Field:
     polymorphicForeignKey: bool
     precision: int
     queryByDistance: bool
+    referenceTo: list[str] | None
+    relationshipName: str | None
     restrictedDelete: bool
     restrictedPicklist: bool
     scale: int
@@ -117,14 +120,14 @@ class Field:
 
 @datacls
 class ChildRelationship:
-    cacadeDelete: bool
-    childSObject: str
-    deprecatedAndHidden: bool
-    field: str
-    junctionIdListNames: list[str]
-    junctionReferenceTo: list[str]
-    relationshipName: str
-    restrictedDelete: bool
+    cascadeDelete: bool | None
+    childSObject: str | None
+    deprecatedAndHidden: bool | None
+    field: str | None
+    junctionIdListNames: list[str] | None
+    junctionReferenceTo: list[str] | None
+    relationshipName: str | None
+    restrictedDelete: bool | None
 
 
 @datacls
@@ -174,6 +177,7 @@ class SObjectBasic:
 @datacls
 class SObject:
     activateable: bool
+    childRelationships: list[ChildRelationship] | None
     compactLayoutable: bool
     createable: bool
     custom: bool
@@ -212,13 +216,19 @@ class SObjects:
     sobjects: list[SObjectBasic]
 
 
-def sobject_field_type(field: Field) -> Any:
-    """Return the Python type associated with an SObject field."""
+def field_base_type(type: str) -> Any:
+    """Return the Python type associated with an SObject field type, without constraints."""
 
     try:
-        result = _type_mappings[field.type]
+        return _type_mappings[type]
     except KeyError:
-        raise TypeError(f"unsupported field type: {field.type}")
+        raise TypeError(f"unsupported field type: {type}")
+
+
+def sobject_field_type(field: Field) -> Any:
+    """Return the Python type associated with an SObject field."""
+
+    result = field_base_type(field.type)
     if field.length != 0:
         result = Annotated[result, MaxLen(field.length)]
     return result | None
@@ -239,10 +249,7 @@ def sobjects_metadata_resource(client: Client):
         @query
         async def describe(self) -> SObject:
             """Get SObject metadata."""
-            async with client.request(
-                method="GET", path=f"{path}/{self.name}/describe"
-            ) as response:
-                metadata = JSONCodec.get(SObject).decode(await response.json())
+            metadata = await client.get(f"{path}/{self.name}/describe", python_type=SObject)
             if metadata.name != self.name:
                 raise NotFoundError
             return metadata
@@ -254,8 +261,7 @@ def sobjects_metadata_resource(client: Client):
         @operation
         async def get(self) -> SObjects:
             """Get a list of objects."""
-            async with client.request(method="GET", path=f"{path}/") as response:
-                return JSONCodec.get(SObjects).decode(await response.json())
+            return await client.get(f"{path}/", python_type=SObjects)
 
         def __getitem__(self, name: str) -> SObjectMetadataResource:
             return SObjectMetadataResource(name)
@@ -263,21 +269,60 @@ def sobjects_metadata_resource(client: Client):
     return SObjectsMetadataResource()
 
 
-async def sobject_data_resource(client: Client, name: str):
-    """Return resource representing SObject data."""
-
-    try:
-        metadata = await sobjects_metadata_resource(client)[name].describe()
-    except NotFoundError as nfe:
-        raise TypeError(f"sobject not found: {name}") from nfe
-
-    datacls = make_datacls(
-        metadata.name,
-        [(field.name, sobject_field_type(field)) for field in metadata.fields],
-    )
+async def sobject_data_resource(client: Client, name: Any, *, replica: Any = None):
+    """
+    Return resource representing SObject data.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • name: name of Salesforce object, or precompiled model of object
+    • replica: local replica to serve record gets from, while it is fresh
+
+    A precompiled model is a fondat.salesforce.codegen.Model object. Its data class and
+    metadata are used as is; the object is only described on request.
+
+    A replica is a fondat.salesforce.replica.Replica object of the same Salesforce object;
+    otherwise, ValueError is raised. If a record is not found in a fresh replica, or the
+    replica is stale, the record is requested through the REST API. Records are only served
+    from a replica if it provides values of all object fields; otherwise (e.g. an object with
+    binary fields), all records are requested through the REST API, so that records are the
+    same regardless of replica freshness.
+
+    Records contain the path of binary (base64) field content, rather than the content
+    itself; content can be streamed through fondat.salesforce.blobs.Blobs.
+    """
+
+    from fondat.salesforce.codegen import Model  # avoid circular dependencies
+
+    if isinstance(name, Model):
+        metadata = name
+        datacls = metadata.datacls
+        row_template = f"{client.resources['sobjects']}/{metadata.name}/{{ID}}"
+    else:
+        try:
+            metadata = await sobjects_metadata_resource(client)[name].describe()
+        except NotFoundError as nfe:
+            raise TypeError(f"sobject not found: {name}") from nfe
+        datacls = make_datacls(
+            metadata.name,
+            [
+                (
+                    field.name,
+                    str | None if field.type == "base64" else sobject_field_type(field),
+                )
+                for field in metadata.fields
+            ],
+        )
+        row_template = metadata.urls.rowTemplate
 
     codec = JSONCodec.get(datacls)
 
+    if replica is not None:
+        if replica.sobject.name != metadata.name:
+            raise ValueError(f"replica is not of sobject: {metadata.name}")
+        if not {field.name for field in metadata.fields} <= replica.names:
+            replica = None  # replica does not provide all field values
+
     @resource
     class SObjectRecordResource:
         """..."""
@@ -287,16 +332,24 @@ async def sobject_data_resource(client: Client, name: str):
 
         @operation
         async def get(self) -> datacls:
-            path = metadata.urls.rowTemplate.format(ID=self.id)
-            async with client.request(method="GET", path=path) as response:
-                return codec.decode(await response.json())
+            if replica is not None and replica.fresh:
+                if (values := replica.get(self.id)) is not None:
+                    return datacls(**values)
+            path = row_template.format(ID=self.id)
+            return await client.get(path, python_type=datacls)
 
     @resource
     class SObjectResource:
         """..."""
 
+        def __init__(self):
+            self.datacls = datacls
+            self.codec = codec
+
         @query
         async def describe(self) -> SObject:
+            if not isinstance(metadata, SObject):  # precompiled model
+                return await sobjects_metadata_resource(client)[metadata.name].describe()
             return metadata
 
         def __getitem__(self, id) -> SObjectRecordResource:
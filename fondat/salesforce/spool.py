@@ -0,0 +1,136 @@
+"""Fondat Salesforce bulk query spool module."""
+
+import asyncio
+import mmap
+import tempfile
+import zlib
+
+from contextlib import suppress
+from fondat.csv import TypedDictCodec
+from fondat.salesforce.bulk import SObjectQuery
+from fondat.salesforce.jobs import parse_csv
+from typing import Any
+
+
+class QuerySpool:
+    """
+    Downloads the results of a bulk data query once, into a local compressed spool file,
+    to be read by multiple consumers.
+
+    Parameters:
+    • query: bulk data query to spool results from
+    • path: path of spool file to create  [anonymous temporary file]
+    • level: zlib compression level of spooled result pages
+
+    The spool enters and exits the query context. Result pages are downloaded in the
+    background as fast as they can be retrieved; each page is compressed and appended to the
+    spool file, which is memory-mapped for reads. Each reader has its own cursor, consuming
+    rows at its own pace; a reader created after rows have been spooled starts by replaying
+    rows from the beginning.
+    """
+
+    def __init__(self, query: SObjectQuery, *, path: str | None = None, level: int = 1):
+        self.query = query
+        self.path = path
+        self.level = level
+        self.file = None
+        self.frames = []  # offset and length of each compressed page in spool file
+        self.size = 0
+        self.done = False
+        self.error = None
+        self._mmap = None
+        self._changed = asyncio.Event()
+        self._task = None
+
+    async def __aenter__(self):
+        if self.file is not None:
+            raise RuntimeError("context is not reentrant")
+        self.file = open(self.path, "w+b") if self.path else tempfile.TemporaryFile()
+        try:
+            await self.query.__aenter__()
+        except BaseException:
+            self.file.close()
+            raise
+        self._task = asyncio.create_task(self._spool())
+        return self
+
+    async def __aexit__(self, *args):
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        try:
+            await self.query.__aexit__(*args)
+        finally:
+            if self._mmap is not None:
+                self._mmap.close()
+            self.file.close()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _spool(self):
+        """Download result pages, appending them to the spool file."""
+        try:
+            async for data in self.query.pages():
+                frame = zlib.compress(data, self.level)
+                self.file.write(frame)
+                self.file.flush()
+                self.frames.append((self.size, len(frame)))
+                self.size += len(frame)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    def _read(self, frame: int) -> bytes:
+        """Read and decompress a spooled result page."""
+        offset, length = self.frames[frame]
+        if self._mmap is None or len(self._mmap) < offset + length:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return zlib.decompress(self._mmap[offset : offset + length])
+
+    def reader(self) -> "SpoolReader":
+        """Return a new reader of spooled rows, starting from the first row."""
+        if self.file is None:
+            raise RuntimeError("must read within async context")
+        return SpoolReader(self)
+
+
+class SpoolReader:
+    """
+    Asynchronous iterator over the decoded rows of a query spool.
+
+    Parameters:
+    • spool: query spool to read rows from
+
+    If the reader reaches the end of spooled rows before the download is complete, it waits
+    for subsequent result pages to be spooled.
+    """
+
+    def __init__(self, spool: QuerySpool):
+        self.spool = spool
+        self.frame = 0
+        self.rows = iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        spool = self.spool
+        while (row := next(self.rows, None)) is None:
+            while self.frame >= len(spool.frames):
+                if spool.error:
+                    raise spool.error
+                if spool.done:
+                    raise StopAsyncIteration
+                await spool._changed.wait()
+            rows = parse_csv(spool._read(self.frame))
+            self.frame += 1
+            codec = TypedDictCodec(spool.query.td, rows[0], codecs=spool.query.codecs)
+            self.rows = (codec.decode(row) for row in rows[1:])
+        return row
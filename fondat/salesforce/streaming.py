@@ -0,0 +1,195 @@
+"""Fondat Salesforce streaming module."""
+
+import asyncio
+import fondat.error
+import logging
+
+from collections.abc import Iterable, MutableMapping
+from contextlib import suppress
+from fondat.codec import DecodeError, JSONCodec
+from fondat.data import datacls
+from fondat.salesforce.client import Client
+from fondat.salesforce.sobjects import SObject, sobject_field_type
+from typing import Any
+
+
+_logger = logging.getLogger(__name__)
+
+
+REPLAY_NEW = -1  # replay id to receive only new events
+REPLAY_ALL = -2  # replay id to receive all retained events
+
+
+@datacls
+class Event:
+    channel: str
+    replayId: int
+    payload: dict[str, Any]
+
+
+class Subscriber:
+    """
+    Subscribes to Change Data Capture and platform event channels through the CometD
+    streaming API, delivering events in batches.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • channels: channels to subscribe to; example: "/data/AccountChangeEvent"
+    • sobjects: metadata of objects used to decode event payloads
+    • replay: mapping of channel to replay id of last processed event  [new events only]
+    • batch_size: maximum number of events to deliver in a batch
+    • buffer: maximum number of received events not yet delivered
+
+    Iterating over the subscriber yields lists of events. When the next batch is requested,
+    the events of the previously delivered batch are considered processed, and the replay
+    mapping is updated with their replay ids; a persistent mapping can be supplied to resume
+    from the last processed event in a subsequent subscription.
+
+    Payload fields of an object in sobjects are decoded to types according to their field
+    metadata. The object is determined by the entity name in the change event header, or by
+    the platform event name in the channel. Values that cannot be decoded (e.g. compound name
+    fields) are passed through as received.
+
+    When the buffer of undelivered events is full, the subscriber stops polling for events
+    until the buffer is drained.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        channels: Iterable[str],
+        *,
+        sobjects: Iterable[SObject] = (),
+        replay: MutableMapping[str, int] | None = None,
+        batch_size: int = 100,
+        buffer: int = 1000,
+    ):
+        self.client = client
+        self.path = f"/cometd/{client.version}"
+        self.channels = list(channels)
+        self.replay = {} if replay is None else replay
+        self.batch_size = batch_size
+        self.codecs = {
+            sobject.name: {
+                field.name: JSONCodec.get(sobject_field_type(field)) for field in sobject.fields
+            }
+            for sobject in sobjects
+        }
+        self.client_id = None
+        self.received = {}  # replay id of last received event in each channel
+        self.delivered = {}  # replay id of last delivered event in each channel
+        self.events = asyncio.Queue(buffer)
+        self.task = None
+
+    async def _send(self, *messages: dict[str, Any]) -> list[dict[str, Any]]:
+        async with self.client.request("POST", self.path, json=list(messages)) as response:
+            return await response.json()
+
+    async def _handshake(self):
+        response = await self._send(
+            {
+                "channel": "/meta/handshake",
+                "version": "1.0",
+                "minimumVersion": "1.0",
+                "supportedConnectionTypes": ["long-polling"],
+                "ext": {"replay": True},
+            }
+        )
+        message = response[0]
+        if not message.get("successful"):
+            raise fondat.error.InternalServerError(f"handshake failed: {message.get('error')}")
+        self.client_id = message["clientId"]
+        for channel in self.channels:
+            replay = self.received.get(channel, self.replay.get(channel, REPLAY_NEW))
+            response = await self._send(
+                {
+                    "channel": "/meta/subscribe",
+                    "clientId": self.client_id,
+                    "subscription": channel,
+                    "ext": {"replay": {channel: replay}},
+                }
+            )
+            message = response[0]
+            if not message.get("successful"):
+                raise fondat.error.BadRequestError(
+                    f"subscribe to {channel} failed: {message.get('error')}"
+                )
+
+    def _decode(self, channel: str, data: dict[str, Any]) -> Event:
+        payload = data.get("payload") or {}
+        name = (payload.get("ChangeEventHeader") or {}).get("entityName")
+        codecs = self.codecs.get(name or channel.rsplit("/", 1)[-1]) or {}
+        decoded = {}
+        for key, value in payload.items():
+            codec = codecs.get(key)
+            if codec is not None and value is not None:
+                with suppress(DecodeError):
+                    value = codec.decode(value)
+            decoded[key] = value
+        return Event(channel=channel, replayId=data["event"]["replayId"], payload=decoded)
+
+    async def _poll(self):
+        """Poll for events using long-polling connect requests."""
+        await self._handshake()
+        while True:
+            messages = await self._send(
+                {
+                    "channel": "/meta/connect",
+                    "clientId": self.client_id,
+                    "connectionType": "long-polling",
+                }
+            )
+            reconnect = "retry"
+            for message in messages:
+                channel = message.get("channel")
+                if channel == "/meta/connect":
+                    advice = message.get("advice") or {}
+                    reconnect = advice.get("reconnect", reconnect)
+                    if not message.get("successful"):
+                        _logger.debug("connect failed: %s", message.get("error"))
+                        if "403" in str(message.get("error")):
+                            reconnect = "handshake"
+                    if interval := advice.get("interval"):
+                        await asyncio.sleep(interval / 1000)
+                elif channel in self.channels and "data" in message:
+                    event = self._decode(channel, message["data"])
+                    self.received[channel] = event.replayId
+                    await self.events.put(event)  # blocks while buffer is full
+            if reconnect == "none":
+                raise fondat.error.InternalServerError("server advised not to reconnect")
+            if reconnect == "handshake":
+                _logger.debug("rehandshaking")
+                await self._handshake()
+
+    async def __aenter__(self):
+        if self.task is not None:
+            raise RuntimeError("context is not reentrant")
+        self.task = asyncio.create_task(self._poll())
+        return self
+
+    async def __aexit__(self, *args):
+        self.task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self.task
+        if self.client_id:
+            with suppress(Exception):
+                await self._send({"channel": "/meta/disconnect", "clientId": self.client_id})
+
+    def __aiter__(self):
+        if self.task is None:
+            raise RuntimeError("must iterate within async context")
+        return self
+
+    async def __anext__(self) -> list[Event]:
+        self.replay.update(self.delivered)  # previous batch processed
+        get = asyncio.create_task(self.events.get())
+        done, _ = await asyncio.wait({get, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        if get not in done:
+            get.cancel()
+            self.task.result()  # raise polling exception
+            raise StopAsyncIteration
+        batch = [get.result()]
+        while len(batch) < self.batch_size and not self.events.empty():
+            batch.append(self.events.get_nowait())
+        self.delivered = {event.channel: event.replayId for event in batch}
+        return batch
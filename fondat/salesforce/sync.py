@@ -0,0 +1,163 @@
+"""Fondat Salesforce change-detecting sync module."""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+
+from collections.abc import AsyncIterable, Iterable, Mapping
+from fondat.codec import JSONCodec
+from fondat.data import datacls
+from fondat.salesforce.buffer import WriteBuffer
+from fondat.salesforce.client import Client
+from fondat.salesforce.sobjects import SObject, sobject_field_type
+from typing import Any
+
+
+@datacls
+class SyncResult:
+    sent: int
+    skipped: int
+    failed: int
+
+
+class SyncWriter:
+    """
+    Writes records to Salesforce, skipping records that have not changed since they were
+    last successfully written.
+
+    Parameters:
+    • client: client object through which to perform requests
+    • sobject: Salesforce object metadata
+    • path: path to SQLite database file storing record hashes
+    • key: field identifying records; "Id" to update, or an external ID field to upsert
+    • batch_size: number of records to write per batch request
+    • max_age: maximum seconds a record is buffered before it is written
+
+    A hash of each record is computed over its values of fields defined in the object
+    metadata, encoded according to field type. A record whose hash matches the stored hash
+    for its key is skipped; other records are written in batches through a write buffer.
+    Stored hashes are only updated once Salesforce confirms a record was written; failed
+    records are written again by a subsequent sync.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        sobject: SObject,
+        path: str,
+        *,
+        key: str = "Id",
+        batch_size: int = 200,
+        max_age: float = 1.0,
+    ):
+        self.client = client
+        self.sobject = sobject
+        self.key = key
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.fields = {f.name: f for f in sobject.fields}
+        if key not in self.fields:
+            raise ValueError(f"unknown key field: {key}")
+        self.order = {name: n for n, name in enumerate(self.fields)}
+        self.codecs = {n: JSONCodec.get(sobject_field_type(f)) for n, f in self.fields.items()}
+        self.name = f"{sobject.name}.{key}"
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS _hashes "
+                "(name TEXT, key TEXT, hash BLOB, PRIMARY KEY (name, key))"
+            )
+
+    def _encode(self, row: Mapping[str, Any]) -> dict[str, Any]:
+        """Encode row values as JSON values, in field metadata order."""
+        encoded = {}
+        for name in sorted(row, key=lambda n: self.order.get(n, -1)):
+            if name not in self.codecs:
+                raise ValueError(f"unknown field: {name}")
+            value = row[name]
+            encoded[name] = self.codecs[name].encode(value) if value is not None else None
+        return encoded
+
+    @staticmethod
+    def _hash(values: Mapping[str, Any]) -> bytes:
+        data = json.dumps(list(values.items()), separators=(",", ":")).encode()
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def _stored(self, key: str) -> bytes | None:
+        row = self._db.execute(
+            "SELECT hash FROM _hashes WHERE name = ? AND key = ?", (self.name, key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _store(self, hashes: list[tuple[str, bytes]]):
+        """Store confirmed record hashes; performed in a worker thread."""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO _hashes VALUES (?, ?, ?)",
+                ((self.name, key, digest) for key, digest in hashes),
+            )
+
+    async def sync(
+        self, rows: Iterable[Mapping[str, Any]] | AsyncIterable[Mapping[str, Any]]
+    ) -> SyncResult:
+        """
+        Write new and changed records, returning counts of records sent, skipped as
+        unchanged, and failed. Each row must contain the key field.
+        """
+        if not isinstance(rows, AsyncIterable):
+            rows = _aiter(rows)
+        result = SyncResult(sent=0, skipped=0, failed=0)
+        pending = []  # (key, hash, future) of sent records
+
+        async def settle():
+            """Wait for pending writes, storing hashes of records confirmed as written."""
+            results = await asyncio.gather(*(f for _, _, f in pending), return_exceptions=True)
+            confirmed = []
+            for (key, digest, _), saved in zip(pending, results):
+                if isinstance(saved, BaseException) or not saved.success:
+                    result.failed += 1
+                else:
+                    confirmed.append((key, digest))
+            pending.clear()
+            await asyncio.to_thread(self._store, confirmed)
+
+        try:
+            async with WriteBuffer(
+                self.client, self.sobject.name, batch_size=self.batch_size, max_age=self.max_age
+            ) as buffer:
+                async for row in rows:
+                    values = self._encode(row)
+                    key = values.get(self.key)
+                    if key is None:
+                        raise ValueError(f"row missing key field: {self.key}")
+                    digest = self._hash(values)
+                    if self._stored(key) == digest:
+                        result.skipped += 1
+                        continue
+                    if self.key == "Id":
+                        future = buffer.update(
+                            key, {n: v for n, v in values.items() if n != "Id"}
+                        )
+                    else:
+                        future = buffer.upsert(self.key, values)
+                    pending.append((key, digest, future))
+                    result.sent += 1
+                    if len(pending) >= 1000:
+                        await buffer.flush()
+                        await settle()
+        finally:
+            for _, _, future in pending:
+                if not future.done():  # buffer exit interrupted
+                    future.cancel()
+            await settle()  # also store hashes of records written before an exception
+        return result
+
+    def close(self) -> None:
+        """Close the hash database connection."""
+        self._db.close()
+
+
+async def _aiter(rows: Iterable[Any]) -> AsyncIterable[Any]:
+    for row in rows:
+        yield row
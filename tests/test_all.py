@@ -1,18 +1,36 @@
 import aiohttp
 import asyncio
+import collections
+import concurrent.futures
 import contextlib
+import datetime
+import fondat.data
+import fondat.salesforce.blobs
+import fondat.salesforce.buffer
 import fondat.salesforce.bulk
+import fondat.salesforce.cassette
 import fondat.salesforce.client
+import fondat.salesforce.codegen
+import fondat.salesforce.composite
+import fondat.salesforce.graphql
 import fondat.salesforce.jobs
 import fondat.salesforce.limits
+import fondat.salesforce.metadata
 import fondat.salesforce.oauth
+import fondat.salesforce.pool
+import fondat.salesforce.query
+import fondat.salesforce.replica
 import fondat.salesforce.service as service
 import fondat.salesforce.sobjects
+import fondat.salesforce.spool
+import fondat.salesforce.streaming
+import fondat.salesforce.sync
 import os
 import pytest
 
+from aiohttp import web
 from fondat.error import NotFoundError
-from fondat.salesforce.bulk import SObjectQuery
+from fondat.salesforce.bulk import AdaptivePageSize, SObjectQuery, describe_related
 from pytest import fixture
 
 
@@ -54,13 +72,109 @@ def refresh_authenticator():
 
 
 @contextlib.asynccontextmanager
-async def _client(authenticator):
+async def _client(authenticator, *, version=VERSION, **kwargs):
     async with aiohttp.ClientSession() as session:
         yield await fondat.salesforce.client.Client.create(
-            session=session, version=VERSION, authenticate=authenticator
+            session=session, version=version, authenticate=authenticator, **kwargs
         )
 
 
+@contextlib.asynccontextmanager
+async def _standin_server(routes):
+    """Yield an authenticator for a local stand-in server with the specified routes."""
+    path = f"/services/data/v{VERSION}"
+
+    async def versions(request):
+        return web.json_response([{"label": "", "url": path[1:], "version": VERSION}])
+
+    async def resources(request):
+        return web.json_response(
+            {r: f"{path}/{r}" for r in ("composite", "jobs", "limits", "query", "sobjects")}
+        )
+
+    app = web.Application()
+    app.router.add_get("/services/data/", versions)
+    app.router.add_get(f"{path}/", resources)
+    app.router.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = site._server.sockets[0].getsockname()[:2]
+
+    async def authenticate(session):
+        return fondat.salesforce.oauth.Token(
+            access_token="token",
+            signature="",
+            scope=None,
+            instance_url=f"http://{host}:{port}",
+            id="",
+            token_type="Bearer",
+            issued_at="",
+            refresh_token=None,
+            state=None,
+        )
+
+    try:
+        yield authenticate
+    finally:
+        await runner.cleanup()
+
+
+@contextlib.asynccontextmanager
+async def _standin_client(routes, **kwargs):
+    """Yield a client connected to a local stand-in server with the specified routes."""
+    async with _standin_server(routes) as authenticate:
+        async with _client(authenticate, **kwargs) as client:
+            yield client
+
+
+def _standin_bulk_routes(results):
+    """
+    Return stand-in server routes that complete bulk query jobs immediately, with CSV results
+    returned by the results function for each query, and the list of queries performed.
+    """
+    path = f"/services/data/v{VERSION}/jobs/query"
+    queries = []
+
+    def job(id, state):
+        return {
+            "id": id,
+            "operation": "query",
+            "object": "Account",
+            "createdById": "005",
+            "createdDate": "2023-01-01T00:00:00.000+0000",
+            "state": state,
+            "concurrencyMode": "Parallel",
+            "contentType": "CSV",
+            "apiVersion": float(VERSION),
+            "lineEnding": "LF",
+            "columnDelimiter": "COMMA",
+        }
+
+    async def create(request):
+        queries.append((await request.json())["query"])
+        return web.json_response(job(str(len(queries)), "UploadComplete"))
+
+    async def get(request):
+        return web.json_response(job(request.match_info["id"], "JobComplete"))
+
+    async def data(request):
+        query = queries[int(request.match_info["id"]) - 1]
+        return web.Response(body=results(query), headers={"Sforce-Locator": "null"})
+
+    async def delete(request):
+        return web.Response(status=204)
+
+    routes = [
+        web.post(f"{path}/", create),
+        web.get(f"{path}/{{id}}", get),
+        web.get(f"{path}/{{id}}/results", data),
+        web.delete(f"{path}/{{id}}", delete),
+    ]
+    return routes, queries
+
+
 @pytest.fixture(scope="module")
 async def client(refresh_authenticator):
     async with _client(refresh_authenticator) as client:
@@ -104,6 +218,185 @@ async def test_sobject_get(client):
     assert account.Id == account_id
 
 
+async def test_composite_get(client):
+    account_id = "0015e00000BOnAVAA1"
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    composite = fondat.salesforce.composite.Composite(client)
+    account = composite.get("Account", account_id, type=accounts.datacls)
+    owner = composite.get("User", account.field("OwnerId"))
+    results = await composite.execute()
+    assert results[account].body.Id == account_id
+    assert results[owner].body["Id"] == results[account].body.OwnerId
+
+
+async def test_composite_graph():
+    graphs = []
+
+    async def graph(request):
+        body = await request.json()
+        graphs.extend(g["compositeRequest"] for g in body["graphs"])
+        return web.json_response(
+            {
+                "graphs": [
+                    {
+                        "graphId": g["graphId"],
+                        "isSuccessful": True,
+                        "graphResponse": {
+                            "compositeResponse": [
+                                {
+                                    "referenceId": r["referenceId"],
+                                    "httpStatusCode": 201,
+                                    "httpHeaders": {},
+                                    "body": {
+                                        "id": r["referenceId"],
+                                        "success": True,
+                                        "errors": [],
+                                    },
+                                }
+                                for r in g["compositeRequest"]
+                            ]
+                        },
+                    }
+                    for g in body["graphs"]
+                ]
+            }
+        )
+
+    path = f"/services/data/v{VERSION}/composite/graph"
+    async with _standin_client([web.post(path, graph)]) as client:
+        composite = fondat.salesforce.composite.Composite(client, graph=True)
+        related = {}
+        for n in range(300):
+            account = composite.create("Account", {"Name": f"{n}"})
+            contact = composite.create("Contact", {"AccountId": account, "LastName": f"{n}"})
+            related[account.reference_id] = contact.reference_id
+        results = await composite.execute()
+    assert len(graphs) == 2
+    assert all(len(g) <= fondat.salesforce.composite.GRAPH_LIMIT for g in graphs)
+    placement = {
+        r["referenceId"]: (n, i) for n, g in enumerate(graphs) for i, r in enumerate(g)
+    }
+    assert len(placement) == 600
+    for account, contact in related.items():  # same graph, in order of addition
+        assert placement[account][0] == placement[contact][0]
+        assert placement[account][1] < placement[contact][1]
+    assert len(results) == 600
+    assert all(result.body.success for result in results.values())
+
+
+async def test_replica(client, tmp_path):
+    account_id = "0015e00000BOnAVAA1"
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    replica = fondat.salesforce.replica.Replica(
+        client, await accounts.describe(), str(tmp_path / "replica.db")
+    )
+    try:
+        await replica.refresh()
+        assert replica.fresh
+        assert replica.get(account_id)["Id"] == account_id
+        accounts = await fondat.salesforce.sobjects.sobject_data_resource(
+            client, "Account", replica=replica
+        )
+        assert (await accounts[account_id].get()).Id == account_id
+        await replica.refresh()  # delta
+    finally:
+        replica.close()
+
+
+async def test_replica_without_is_deleted(tmp_path):
+    records = {"0011": "2023-01-01T00:00:00.000Z", "0012": "2023-01-02T00:00:00.000Z"}
+
+    def results(query):
+        rows = "".join(f'"{id}","{modstamp}"\n' for id, modstamp in records.items())
+        return f'"Id","SystemModstamp"\n{rows}'
+
+    routes, queries = _standin_bulk_routes(results)
+    sobject = fondat.salesforce.metadata.MetadataStore().add(
+        {
+            "name": "Account",
+            "fields": [
+                {"name": "Id", "type": "id"},
+                {"name": "SystemModstamp", "type": "datetime"},
+            ],
+        }
+    )
+    async with _standin_client(routes) as client:
+        replica = fondat.salesforce.replica.Replica(
+            client, sobject, str(tmp_path / "replica.db")
+        )
+        try:
+            await replica.refresh()
+            del records["0011"]  # deleted; not reported without IsDeleted field
+            await replica.refresh()
+            assert replica.get("0011") is None
+            assert replica.get("0012")["Id"] == "0012"
+            assert all("WHERE" not in query for query in queries)  # full extractions
+        finally:
+            replica.close()
+
+
+async def test_replica_other_sobject(tmp_path):
+    describe = {"name": "Contact", "fields": [{"name": "Id", "type": "id"}]}
+    contact = fondat.salesforce.codegen.Model(
+        fondat.data.make_datacls("Contact", [("Id", str | None)]), describe
+    )
+    account = fondat.salesforce.metadata.MetadataStore().add({**describe, "name": "Account"})
+    replica = fondat.salesforce.replica.Replica(None, account, str(tmp_path / "replica.db"))
+    try:
+        async with _standin_client([]) as client:
+            with pytest.raises(ValueError):
+                await fondat.salesforce.sobjects.sobject_data_resource(
+                    client, contact, replica=replica
+                )
+    finally:
+        replica.close()
+
+
+def test_replica_compound_fields(tmp_path):
+    store = fondat.salesforce.metadata.MetadataStore()
+    address = {"compoundFieldName": "BillingAddress"}
+    sobject = store.add(
+        {
+            "name": "Account",
+            "fields": [
+                {"name": "Id", "type": "id"},
+                {"name": "BillingAddress", "type": "address"},
+                {"name": "BillingStreet", "type": "textarea", **address},
+                {"name": "BillingCity", "type": "string", **address},
+                {"name": "BillingStateCode", "type": "picklist", **address},
+                {"name": "BillingLatitude", "type": "double", **address},
+                {"name": "ShippingAddress", "type": "address"},
+                {
+                    "name": "ShippingCity",
+                    "type": "string",
+                    "compoundFieldName": "ShippingAddress",
+                },
+                {"name": "Body", "type": "base64"},
+            ],
+        }
+    )
+    replica = fondat.salesforce.replica.Replica(
+        client=None, sobject=sobject, path=str(tmp_path / "replica.db")
+    )
+    try:
+        replica._write(
+            replica.table, [["0011", "1 Main St", "Springfield", "IL", "39.8", ""]], []
+        )
+        values = replica.get("0011")
+        assert values["BillingAddress"] == fondat.salesforce.sobjects.Address(
+            street="1 Main St",
+            city="Springfield",
+            stateCode="IL",
+            latitude=39.8,
+            longitude=None,
+        )
+        assert values["ShippingAddress"] is None
+        assert "BillingAddress" in replica.names
+        assert "Body" not in replica.names  # records served through REST API
+    finally:
+        replica.close()
+
+
 async def test_bulk_fields(client):
     accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
     sobject = await accounts.describe()
@@ -142,6 +435,639 @@ async def test_bulk_columns(client):
             break
 
 
+async def test_bulk_executor(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    sobject = await accounts.describe()
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        async with SObjectQuery(client, sobject, limit=10, executor=executor) as query:
+            rows = [row async for row in query]
+    assert len(rows) == 10
+    assert all(row["Id"] for row in rows)
+
+
+async def test_bulk_relationship(client):
+    contacts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Contact")
+    sobject = await contacts.describe()
+    columns = ["Id", "Account.Name", "Account.Owner.Email"]
+    related = await describe_related(client, sobject, columns)
+    async with SObjectQuery(
+        client, sobject, columns=columns, related=related, where="AccountId != null", limit=1
+    ) as query:
+        async for row in query:
+            assert row["Account.Name"]
+            assert "Account.Owner.Email" in row
+
+
+async def test_bulk_adaptive_page_size(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    sobject = await accounts.describe()
+    page_size = AdaptivePageSize(initial=1000)
+    async with SObjectQuery(client, sobject, columns={"Id"}, page_size=page_size) as query:
+        async for row in query:
+            assert row["Id"]
+    assert page_size.bytes_per_row
+
+
+def test_bulk_count_rows():
+    data = b'"Id","Description"\n"1","a\nb"\n"2","""quoted""\n\nc"\n"3",""\n'
+    assert fondat.salesforce.bulk._count_rows(data) == 3
+    assert fondat.salesforce.bulk._count_rows(b'"Id"\n"1"') == 1
+    assert fondat.salesforce.bulk._count_rows(b'"Id"\n') == 0
+    page_size = AdaptivePageSize(target_bytes=100_000)
+    assert page_size.update(rows=1000, nbytes=1_000_000, seconds=1.0) < 1000
+
+
+async def test_reap_orphans():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    old = (now - datetime.timedelta(days=2)).isoformat()
+    jobs = [  # id, created by, created date, state
+        ("7501", "005A", old, "JobComplete"),
+        ("7502", "005A", old, "InProgress"),
+        ("7503", "005A", now.isoformat(), "JobComplete"),
+        ("7504", "005B", old, "JobComplete"),
+    ]
+    calls = []
+
+    async def list_jobs(request):
+        records = [
+            {
+                "id": id,
+                "operation": "query",
+                "object": "Account",
+                "createdById": created_by,
+                "createdDate": created,
+                "state": state,
+                "concurrencyMode": "Parallel",
+                "contentType": "CSV",
+                "apiVersion": float(VERSION),
+                "lineEnding": "LF",
+                "columnDelimiter": "COMMA",
+            }
+            for id, created_by, created, state in jobs
+        ]
+        return web.json_response({"done": True, "records": records, "nextRecordsUrl": None})
+
+    async def job(request):
+        calls.append((request.method, request.match_info["id"]))
+        return web.json_response({}) if request.method == "PATCH" else web.Response(status=204)
+
+    path = f"/services/data/v{VERSION}/jobs/query"
+    routes = [
+        web.get(path, list_jobs),
+        web.patch(f"{path}/{{id}}", job),
+        web.delete(f"{path}/{{id}}", job),
+    ]
+    async with _standin_client(routes) as client:
+        reaper = fondat.salesforce.jobs.JobReaper(client)
+        older_than = datetime.timedelta(days=1)
+        assert await reaper.reap_orphans(older_than=older_than, created_by="005A") == 1
+        assert calls == [("DELETE", "7501")]
+        calls.clear()
+        assert (
+            await reaper.reap_orphans(
+                older_than=older_than, created_by="005A", abort_running=True
+            )
+            == 2
+        )
+        assert sorted(calls) == [("DELETE", "7501"), ("DELETE", "7502"), ("PATCH", "7502")]
+
+
+async def test_bulk_parallel(refresh_authenticator):
+    async with _client(refresh_authenticator, version="62.0") as client:  # for resultPages
+        accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+        sobject = await accounts.describe()
+        async with SObjectQuery(client, sobject, columns={"Id"}, order_by="Id") as query:
+            expected = [row["Id"] async for row in query]
+        async with SObjectQuery(
+            client, sobject, columns={"Id"}, order_by="Id", parallel=4
+        ) as query:
+            assert [row["Id"] async for row in query] == expected
+        async with SObjectQuery(
+            client, sobject, columns={"Id"}, parallel=4, ordered=False
+        ) as query:
+            assert sorted([row["Id"] async for row in query]) == sorted(expected)
+
+
+async def test_bulk_parallel_version():
+    sobject = fondat.salesforce.metadata.MetadataStore().add(
+        {"name": "Account", "fields": [{"name": "Id", "type": "id"}]}
+    )
+    async with _standin_client([]) as client:  # API version 57.0
+        with pytest.raises(ValueError):
+            SObjectQuery(client, sobject, parallel=4)
+
+
+async def test_bulk_partitioned(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    sobject = await accounts.describe()
+    async with SObjectQuery(client, sobject, order_by="Id") as query:
+        expected = [row async for row in query]
+    async with fondat.salesforce.bulk.PartitionedQuery(client, sobject, group_size=20) as query:
+        assert len(query.queries) > 1
+        assert [row async for row in query] == expected
+
+
+async def test_bulk_memoized_values(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    sobject = await accounts.describe()
+    async with SObjectQuery(client, sobject, columns={"Id", "OwnerId"}) as query:
+        owners = {}
+        async for row in query:
+            owner = owners.setdefault(row["OwnerId"], row["OwnerId"])
+            assert row["OwnerId"] is owner
+
+
+async def test_bulk_early_exit(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    sobject = await accounts.describe()
+    reaper = fondat.salesforce.jobs.JobReaper(client)
+    async with SObjectQuery(client, sobject, reaper=reaper) as query:
+        id = query.query.id
+    await reaper.wait()
+    with pytest.raises(NotFoundError):
+        await fondat.salesforce.jobs.queries_resource(client)[id].get()
+
+
+async def test_bulk_spool(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    sobject = await accounts.describe()
+    query = SObjectQuery(client, sobject, columns={"Id", "Name"}, limit=10)
+    async with fondat.salesforce.spool.QuerySpool(query) as spool:
+
+        async def read():
+            return [row async for row in spool.reader()]
+
+        first, second = await asyncio.gather(read(), read())
+        late = await read()
+    assert len(first) == 10
+    assert first == second == late
+
+
+async def test_streaming_subscriber():
+    channel = "/data/OpportunityChangeEvent"
+    pending = [
+        {
+            "channel": channel,
+            "data": {
+                "event": {"replayId": n},
+                "payload": {
+                    "ChangeEventHeader": {"entityName": "Opportunity", "changeType": "UPDATE"},
+                    "CloseDate": f"2023-01-0{n}",
+                },
+            },
+        }
+        for n in range(1, 6)
+    ]
+    subscriptions = []
+
+    async def cometd(request):
+        response = []
+        for message in await request.json():
+            if message["channel"] == "/meta/handshake":
+                message |= {"successful": True, "clientId": "standin"}
+            elif message["channel"] == "/meta/subscribe":
+                subscriptions.append(message["ext"]["replay"])
+                message |= {"successful": True}
+            elif message["channel"] == "/meta/connect":
+                await asyncio.sleep(0.01)
+                response.extend(pending[:3])
+                del pending[:3]
+                message |= {"successful": True, "advice": {"reconnect": "retry"}}
+            response.append(message)
+        return web.json_response(response)
+
+    store = fondat.salesforce.metadata.MetadataStore()
+    store.add({"name": "Opportunity", "fields": [{"name": "CloseDate", "type": "date"}]})
+    replay = {}
+    async with _standin_client([web.post(f"/cometd/{VERSION}", cometd)]) as client:
+        async with fondat.salesforce.streaming.Subscriber(
+            client, [channel], sobjects=store.values(), replay=replay, batch_size=2
+        ) as subscriber:
+            events = []
+            async for batch in subscriber:
+                assert len(batch) <= 2
+                events.extend(batch)
+                if len(events) == 5:
+                    break
+    assert subscriptions == [{channel: fondat.salesforce.streaming.REPLAY_NEW}]
+    assert [event.replayId for event in events] == [1, 2, 3, 4, 5]
+    assert events[0].payload["CloseDate"] == datetime.date(2023, 1, 1)
+    assert replay[channel] < 5  # last batch not yet processed
+
+
+async def test_blobs():
+    content = b"".join(bytes([n]) * 1000 for n in range(100))
+    uploaded = {}
+
+    async def download(request):
+        return web.Response(body=content, content_type="application/octet-stream")
+
+    async def upload(request):
+        async for part in await request.multipart():
+            uploaded[part.name] = await part.read()
+        return web.json_response({"id": "068000000000001", "success": True, "errors": []})
+
+    path = f"/services/data/v{VERSION}/sobjects/ContentVersion"
+    routes = [web.get(f"{path}/{{id}}/VersionData", download), web.post(path, upload)]
+    store = fondat.salesforce.metadata.MetadataStore()
+    sobject = store.add(
+        {
+            "name": "ContentVersion",
+            "fields": [
+                {"name": "Title", "type": "string"},
+                {"name": "VersionData", "type": "base64"},
+            ],
+        }
+    )
+
+    async def chunks():
+        for n in range(0, len(content), 4096):
+            yield content[n : n + 4096]
+
+    async with _standin_client(routes) as client:
+        blobs = fondat.salesforce.blobs.Blobs(client, sobject, chunk_size=4096)
+        received = []
+
+        async def sink(chunk):
+            assert len(chunk) <= 4096
+            received.append(chunk)
+
+        assert await blobs.download("068000000000001", "VersionData", sink) == len(content)
+        assert b"".join(received) == content
+        id = await blobs.upload(
+            "VersionData", chunks(), filename="a.bin", values={"Title": "a"}
+        )
+        assert id == "068000000000001"
+        assert uploaded == {"entity_content": b'{"Title": "a"}', "VersionData": content}
+        with pytest.raises(ValueError):
+            await blobs.download("068000000000001", "Title", sink)
+
+
+async def test_write_buffer():
+    requests = []
+
+    async def collection(request):
+        records = (await request.json())["records"]
+        requests.append((request.method, records))
+        return web.json_response(
+            [
+                {"id": record.get("Id", f"001{n}"), "success": True, "errors": []}
+                for n, record in enumerate(records)
+            ]
+        )
+
+    path = f"/services/data/v{VERSION}/composite/sobjects"
+    routes = [web.post(path, collection), web.patch(path, collection)]
+    async with _standin_client(routes) as client:
+        async with fondat.salesforce.buffer.WriteBuffer(client, "Account") as buffer:
+            name = buffer.update("001A", {"Name": "a"})
+            phone = buffer.update("001A", {"Phone": "1"})
+            created = buffer.create({"Name": "b"})
+            updates = [buffer.update(f"001{n}", {"Name": str(n)}) for n in range(250)]
+        assert (await name).id == (await phone).id == "001A"
+        assert (await created).success
+        assert all(result.success for result in await asyncio.gather(*updates))
+    assert [method for method, _ in requests].count("PATCH") == 2  # 251 updates
+    records = [record for _, records in requests for record in records]
+    assert {
+        "attributes": {"type": "Account"},
+        "Id": "001A",
+        "Name": "a",
+        "Phone": "1",
+    } in records
+
+
+async def test_sync_writer(tmp_path):
+    sent = []
+
+    async def collection(request):
+        records = (await request.json())["records"]
+        sent.extend(record["Id"] for record in records)
+        return web.json_response(
+            [
+                {"id": record["Id"], "success": record.get("Name") != "bad", "errors": []}
+                for record in records
+            ]
+        )
+
+    store = fondat.salesforce.metadata.MetadataStore()
+    sobject = store.add(
+        {
+            "name": "Account",
+            "fields": [
+                {"name": "Id", "type": "id"},
+                {"name": "Name", "type": "string"},
+                {"name": "AnnualRevenue", "type": "currency"},
+            ],
+        }
+    )
+    rows = [{"Id": f"001{n}", "Name": f"{n}", "AnnualRevenue": float(n)} for n in range(10)]
+    rows[1]["Name"] = "bad"
+    path = f"/services/data/v{VERSION}/composite/sobjects"
+    async with _standin_client([web.patch(path, collection)]) as client:
+        writer = fondat.salesforce.sync.SyncWriter(
+            client, sobject, str(tmp_path / "hashes.db"), max_age=0.01
+        )
+        result = await writer.sync(rows)
+        assert (result.sent, result.skipped, result.failed) == (10, 0, 1)
+        sent.clear()
+        rows[2]["AnnualRevenue"] = 100.0
+        result = await writer.sync(rows)
+        assert (result.sent, result.skipped, result.failed) == (2, 8, 1)
+        assert sorted(sent) == ["0011", "0012"]  # failed and changed records
+        writer.close()
+
+
+async def test_sync_writer_failed_row(tmp_path):
+    sent = []
+
+    async def collection(request):
+        records = (await request.json())["records"]
+        sent.extend(record["Id"] for record in records)
+        return web.json_response(
+            [{"id": r["Id"], "success": True, "errors": []} for r in records]
+        )
+
+    store = fondat.salesforce.metadata.MetadataStore()
+    sobject = store.add(
+        {
+            "name": "Account",
+            "fields": [{"name": "Id", "type": "id"}, {"name": "Name", "type": "string"}],
+        }
+    )
+    rows = [{"Id": f"001{n}", "Name": f"{n}"} for n in range(3)]
+    path = f"/services/data/v{VERSION}/composite/sobjects"
+    async with _standin_client([web.patch(path, collection)]) as client:
+        writer = fondat.salesforce.sync.SyncWriter(client, sobject, str(tmp_path / "hashes.db"))
+        with pytest.raises(ValueError):
+            await writer.sync([*rows, {"Name": "no key"}])
+        assert sorted(sent) == ["0010", "0011", "0012"]  # flushed as buffer exited
+        result = await writer.sync(rows)
+        assert (result.sent, result.skipped, result.failed) == (0, 3, 0)
+        writer.close()
+
+
+async def test_codegen():
+    describe = {
+        "name": "Account",
+        "fields": [
+            {"name": "Id", "type": "id", "length": 18},
+            {"name": "Name", "type": "string", "length": 80},
+            {"name": "CreatedDate", "type": "datetime"},
+        ],
+    }
+    location = {  # object name shadows field value type
+        "name": "Location",
+        "fields": [{"name": "Id", "type": "id"}, {"name": "Geo__c", "type": "location"}],
+    }
+    source = fondat.salesforce.codegen.module_source([location, describe], version=VERSION)
+    models = {}
+    exec(compile(source, "models.py", "exec"), models)
+    model = models["Account"]
+    assert model.columns == ("Id", "Name", "CreatedDate")
+    assert model.datacls.__name__ == "Account"
+    assert models["Location"].columns == ("Id",)
+    with pytest.raises(ValueError):
+        fondat.salesforce.codegen.module_source(
+            [{**describe, "name": "VERSION"}], version=VERSION
+        )
+    describe["fields"][1]["length"] = 255
+    describe["fields"].append({"name": "Rating", "type": "picklist", "length": 40})
+
+    async def record(request):  # no describe route; metadata must come from the model
+        return web.json_response({"Id": request.match_info["id"], "Name": "Acme"})
+
+    async def batch(request):
+        return web.json_response(
+            {"hasErrors": False, "results": [{"statusCode": 200, "result": describe}]}
+        )
+
+    path = f"/services/data/v{VERSION}"
+    routes = [
+        web.get(f"{path}/sobjects/Account/{{id}}", record),
+        web.post(f"{path}/composite/batch", batch),
+    ]
+    async with _standin_client(routes) as client:
+        resource = await fondat.salesforce.sobjects.sobject_data_resource(client, model)
+        account = await resource["0011"].get()
+        assert isinstance(account, model.datacls)
+        assert account.Name == "Acme"
+        query = SObjectQuery(client, model, columns=["Id", "Name"])
+        assert query.stmt == "SELECT Id, Name FROM Account"
+        drift = await fondat.salesforce.codegen.check_drift(client, [model])
+    assert drift == {"Account": ["Name: length changed from 80 to 255", "Rating: field added"]}
+
+
+def test_codegen_unsupported_type():
+    describe = {"name": "Account", "fields": [{"name": "X__c", "type": "vector"}]}
+    with pytest.raises(TypeError):
+        fondat.salesforce.codegen.module_source([describe], version=VERSION)
+    assert fondat.salesforce.sobjects.field_base_type("currency") is float
+
+
+async def test_client_pool():
+    path = f"/services/data/v{VERSION}/limits"
+    active = collections.Counter()
+    peak = collections.Counter()
+
+    async def limits(request):
+        tenant = request.headers["X-Tenant"]
+        active[tenant] += 1
+        peak[tenant] = max(peak[tenant], active[tenant])
+        await asyncio.sleep(0.01)
+        active[tenant] -= 1
+        return web.json_response({})
+
+    async with _standin_server([web.get(path, limits)]) as authenticate:
+        async with fondat.salesforce.pool.ClientPool(version=VERSION, concurrency=4) as pool:
+            noisy = await pool.client("noisy", authenticate)
+            quiet = await pool.client("quiet", authenticate, weight=3)
+            assert await pool.client("noisy", authenticate) is noisy
+
+            async def get(client, tenant):
+                await client.get(path, headers={"X-Tenant": tenant})
+
+            flood = asyncio.gather(*(get(noisy, "noisy") for _ in range(100)))
+            await asyncio.sleep(0.02)
+            await asyncio.gather(*(get(quiet, "quiet") for _ in range(30)))
+            assert not flood.done()  # quiet tenant was not queued behind flood
+            assert peak["quiet"] > peak["noisy"] - peak["quiet"]  # weighted share
+            await flood
+            assert pool.scheduler.available == 4
+
+
+async def test_cassette(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    counts = iter(range(1, 10))
+    scrub = {"token": "x", "Account": "Object1"}
+
+    async def record_count(request):
+        count = next(counts)
+        return web.json_response({"sObjects": [{"name": "Account", "count": count}]})
+
+    async def batch(request):
+        return web.json_response({"hasErrors": False, "results": []})
+
+    routes = [
+        web.get(f"/services/data/v{VERSION}/limits/recordCount", record_count),
+        web.post(f"/services/data/v{VERSION}/composite/batch", batch),
+    ]
+    requests = [fondat.salesforce.composite.BatchRequest(method="GET", url="Account")]
+    async with _standin_server(routes) as authenticate:
+        async with aiohttp.ClientSession() as session:
+            recorder = fondat.salesforce.cassette.Recorder(session, path, scrub=scrub)
+            client = await fondat.salesforce.client.Client.create(
+                session=recorder, version=VERSION, authenticate=authenticate
+            )
+            limits = fondat.salesforce.limits.limits_resource(client)
+            recorded = [await limits.record_count(["Account"]) for _ in range(2)]
+            await fondat.salesforce.composite.composite_resource(client).batch(requests)
+            recorder.close()
+    with open(path) as file:
+        text = file.read()
+    assert "token" not in text
+    assert "Account" not in text  # including parameters and request bodies
+    player = fondat.salesforce.cassette.Player(path, scrub=scrub)
+    client = await fondat.salesforce.client.Client.create(
+        session=player, version=VERSION, authenticate=player.authenticate
+    )
+    limits = fondat.salesforce.limits.limits_resource(client)
+    assert [await limits.record_count(["Account"]) for _ in range(2)] == [
+        {"Object1": 1},
+        {"Object1": 2},
+    ]
+    assert recorded == [{"Account": 1}, {"Account": 2}]
+    assert await fondat.salesforce.composite.composite_resource(client).batch(requests) == []
+    with pytest.raises(LookupError):
+        await client.get(f"/services/data/v{VERSION}/limits/")
+
+
+async def test_aggregate_query(client):
+    opportunities = await fondat.salesforce.sobjects.sobject_data_resource(
+        client, "Opportunity"
+    )
+    sobject = await opportunities.describe()
+    query = fondat.salesforce.query.AggregateQuery(
+        client,
+        sobject,
+        group_by=["StageName"],
+        aggregates={"records": ("COUNT", "Id"), "amount": ("SUM", "Amount")},
+    )
+    rows = [row async for row in query]
+    assert rows
+    assert all(isinstance(row["records"], int) for row in rows)
+
+
+async def test_graphql_query(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    opportunities = await fondat.salesforce.sobjects.sobject_data_resource(
+        client, "Opportunity"
+    )
+    opportunity = await opportunities.describe()
+    query = fondat.salesforce.graphql.GraphQLQuery(
+        client,
+        await accounts.describe(),
+        fields=["Id", "Name", "CreatedDate"],
+        children=[
+            fondat.salesforce.graphql.GraphQLQuery.Children(
+                "Opportunities", ["Id", "Amount", "CloseDate"], first=5
+            )
+        ],
+        page_size=10,
+        related={opportunity.name: opportunity},
+    )
+    records = [record async for record in query]
+    assert records
+    assert all(isinstance(record["CreatedDate"], datetime.datetime) for record in records)
+    assert all(len(record["Opportunities"]) <= 5 for record in records)
+
+
+async def test_in_query(client):
+    accounts = await fondat.salesforce.sobjects.sobject_data_resource(client, "Account")
+    sobject = await accounts.describe()
+    async with SObjectQuery(client, sobject, columns={"Id"}) as query:
+        ids = [row["Id"] async for row in query]
+    for bulk in (False, True):
+        query = fondat.salesforce.query.InQuery(
+            client, sobject, "Id", ids + ids[:1], columns=["Id", "Name"], bulk=bulk
+        )
+        assert sorted([row["Id"] async for row in query]) == sorted(ids)
+
+
+async def test_in_query_null_parent():
+    store = fondat.salesforce.metadata.MetadataStore()
+    reference = {"referenceTo": ["Account"], "relationshipName": "Account"}
+    contact = store.add(
+        {
+            "name": "Contact",
+            "fields": [
+                {"name": "Id", "type": "id", "filterable": True},
+                {"name": "AccountId", "type": "reference", **reference},
+            ],
+        }
+    )
+    store.add({"name": "Account", "fields": [{"name": "Name", "type": "string"}]})
+
+    async def rest(request):
+        records = [
+            {"attributes": {}, "Id": "0031", "Account": {"attributes": {}, "Name": "Acme"}},
+            {"attributes": {}, "Id": "0032", "Account": None},
+        ]
+        return web.json_response(
+            {"totalSize": 2, "done": True, "records": records, "nextRecordsUrl": None}
+        )
+
+    routes, _ = _standin_bulk_routes(
+        lambda query: '"Id","Account.Name"\n"0031","Acme"\n"0032",""\n'
+    )
+    routes.append(web.get(f"/services/data/v{VERSION}/query/", rest))
+    async with _standin_client(routes) as client:
+        for bulk in (False, True):
+            query = fondat.salesforce.query.InQuery(
+                client,
+                contact,
+                "Id",
+                ["0031", "0032"],
+                columns=["Id", "Account.Name"],
+                related=store,
+                bulk=bulk,
+            )
+            rows = sorted([row async for row in query], key=lambda row: row["Id"])
+            assert rows == [
+                {"Id": "0031", "Account.Name": "Acme"},
+                {"Id": "0032", "Account.Name": None},
+            ]
+
+
+def test_soql_literal():
+    literal = fondat.salesforce.query.soql_literal
+    assert literal("O'Brien\\") == "'O\\'Brien\\\\'"
+    assert literal(True) == "true"
+    assert literal(None) == "null"
+
+
+async def test_coalesce_requests():
+    requests = 0
+
+    async def limits(request):
+        nonlocal requests
+        requests += 1
+        await asyncio.sleep(0.1)
+        return web.json_response({"DailyApiRequests": {"Max": 10, "Remaining": 5}})
+
+    path = f"/services/data/v{VERSION}/limits/"
+    async with _standin_client([web.get(path, limits)], coalesce=True) as client:
+        resource = fondat.salesforce.limits.limits_resource(client)
+        first, second = await asyncio.gather(resource.get(), resource.get())
+        assert first["DailyApiRequests"].Remaining == 5
+        assert requests == 1
+        cancelled = asyncio.create_task(resource.get())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        assert (await resource.get())["DailyApiRequests"].Max == 10
+        assert requests == 2
+
+
 async def test_invalid_sobject(client):
     with pytest.raises(TypeError):
         await fondat.salesforce.sobjects.sobject_data_resource(client, "account")  # lower case
@@ -166,6 +1092,14 @@ async def test_invalid_sobjects_metadata(client):
         await sobjects["account"].describe()  # lower case
 
 
+async def test_describe_sobjects(client):
+    names = ["Account", "Contact", "Lead", "Opportunity", "Product2"]
+    store = await fondat.salesforce.metadata.describe_sobjects(client, names)
+    assert set(store.keys()) == set(names)
+    assert store.field("Account", "Id").type == "id"
+    assert store["Opportunity"].field("AccountId").referenceTo == ("Account",)
+
+
 # async def test_password_authenticator():
 #     async with _client(_password_authenticator()) as client:
 #         assert await fondat.salesforce.service.service_resource(client).versions()